@@ -1,25 +1,85 @@
 """Base Agent class for all research agents."""
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
 import logging
-from pydantic import BaseModel, Field
+import time
+import weakref
+import config
 
 logger = logging.getLogger(__name__)
 
 
-class AgentState(BaseModel):
+@dataclass(slots=True)
+class AgentState:
     """Represents the state of an agent execution."""
     
     agent_name: str
     status: str = "pending"  # pending, running, completed, failed
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
-    input_data: Dict[str, Any] = Field(default_factory=dict)
-    output_data: Dict[str, Any] = Field(default_factory=dict)
-    errors: List[str] = Field(default_factory=list)
-    metadata: Dict[str, Any] = Field(default_factory=dict)
+    input_data: Dict[str, Any] = field(default_factory=dict)
+    output_data: Dict[str, Any] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    def dict(self) -> Dict[str, Any]:
+        """Serialize to a plain dictionary."""
+        return asdict(self)
+
+
+class _StatePool:
+    """Free list of AgentState objects reused across agent runs."""
+    
+    __slots__ = ('_free', 'max_size')
+    
+    def __init__(self, max_size: int = 64):
+        self._free: List[AgentState] = []
+        self.max_size = max_size
+    
+    def acquire(self, agent_name: str) -> AgentState:
+        """Get a reset state for a new run."""
+        if self._free:
+            state = self._free.pop()
+            state.agent_name = agent_name
+            return state
+        return AgentState(agent_name=agent_name)
+    
+    def release(self, state: AgentState):
+        """Reset a state and return it to the pool."""
+        if len(self._free) >= self.max_size:
+            return
+        state.status = "pending"
+        state.start_time = None
+        state.end_time = None
+        state.input_data.clear()
+        state.output_data.clear()
+        state.errors.clear()
+        state.metadata.clear()
+        self._free.append(state)
+
+
+_POOL = _StatePool()
+
+
+# Per event loop: (semaphore bounding concurrent LLM requests, in-flight
+# requests by prompt key). Semaphores and tasks are bound to the loop that
+# uses them, and each Streamlit run may bring its own loop.
+_LLM_LOOP_STATE = weakref.WeakKeyDictionary()
+
+
+def _llm_loop_state() -> Tuple[asyncio.Semaphore, Dict[str, asyncio.Task]]:
+    """Get the LLM semaphore and in-flight table for the running loop."""
+    loop = asyncio.get_running_loop()
+    state = _LLM_LOOP_STATE.get(loop)
+    if state is None:
+        state = (asyncio.Semaphore(config.MAX_INFLIGHT_LLM_CALLS), {})
+        _LLM_LOOP_STATE[loop] = state
+    return state
 
 
 class BaseAgent(ABC):
@@ -38,7 +98,12 @@ class BaseAgent(ABC):
         self.llm_client = llm_client
         self.model_name = model_name
         self.logger = logging.getLogger(f"Agent.{name}")
-        self.state = AgentState(agent_name=name)
+        self._log = {
+            "debug": self.logger.debug,
+            "info": self.logger.info,
+            "warning": self.logger.warning,
+            "error": self.logger.error,
+        }
         
     @abstractmethod
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -57,33 +122,52 @@ class BaseAgent(ABC):
         """
         Run the agent with error handling and state management.
         
+        Each call gets its own state from a shared pool, so concurrent runs
+        of the same agent don't interfere. Pass the returned state to
+        release_state() once its output has been consumed.
+        
         Args:
             input_data: Input parameters for the agent
             
         Returns:
             AgentState object with execution results
         """
-        self.state.status = "running"
-        self.state.start_time = datetime.now()
-        self.state.input_data = input_data
+        state = _POOL.acquire(self.name)
+        state.status = "running"
+        state.start_time = datetime.now()
+        state.input_data.update(input_data)
+        started = time.perf_counter()
+        log_info = self.logger.isEnabledFor(logging.INFO)
         
         try:
-            self.logger.info(f"Starting {self.name}")
+            if log_info:
+                self.logger.info(f"Starting {self.name}")
             output = await self.execute(input_data)
             
-            self.state.output_data = output
-            self.state.status = "completed"
-            self.logger.info(f"Completed {self.name}")
+            state.output_data.update(output)
+            state.status = "completed"
+            if log_info:
+                self.logger.info(f"Completed {self.name}")
             
         except Exception as e:
             self.logger.error(f"Error in {self.name}: {str(e)}", exc_info=True)
-            self.state.status = "failed"
-            self.state.errors.append(str(e))
+            state.status = "failed"
+            state.errors.append(str(e))
             
         finally:
-            self.state.end_time = datetime.now()
+            state.end_time = state.start_time + timedelta(seconds=time.perf_counter() - started)
             
-        return self.state
+        return state
+    
+    @staticmethod
+    def release_state(state: AgentState):
+        """
+        Return a state obtained from run() to the pool.
+        
+        The state's dictionaries are cleared, so copy out anything still
+        needed before releasing.
+        """
+        _POOL.release(state)
     
     def validate_input(self, input_data: Dict[str, Any], required_keys: List[str]) -> bool:
         """
@@ -101,18 +185,107 @@ class BaseAgent(ABC):
             raise ValueError(f"Missing required input keys: {missing_keys}")
         return True
     
+    def _is_anthropic_client(self) -> bool:
+        """Check whether the configured client is an Anthropic SDK client."""
+        return type(self.llm_client).__module__.startswith("anthropic")
+    
+    async def _chat_completion(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """
+        Send a system + user prompt pair to the LLM.
+        
+        The system prompt is always sent first so providers can reuse the
+        cached prefix: OpenAI-compatible APIs cache identical prefixes
+        automatically, Anthropic needs an explicit cache_control breakpoint.
+        
+        Identical requests already in flight are coalesced into one call,
+        and all requests share a per-loop concurrency limit.
+        
+        Args:
+            system_prompt: Static instructions (should be a module constant)
+            user_prompt: Request-specific content
+            temperature: Sampling temperature
+            max_tokens: Output token limit
+            
+        Returns:
+            Text content of the response
+        """
+        if not self.llm_client:
+            raise ValueError("LLM client not configured")
+        
+        key = hashlib.sha1(
+            f"{self.model_name}\0{temperature}\0{max_tokens}\0"
+            f"{system_prompt}\0{user_prompt}".encode('utf-8')
+        ).hexdigest()
+        
+        sem, inflight = _llm_loop_state()
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._send_completion(
+                sem, system_prompt, user_prompt, temperature, max_tokens
+            ))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+            
+        # Shield so one caller's cancellation doesn't fail the others
+        return await asyncio.shield(task)
+    
+    async def _send_completion(
+        self,
+        sem: asyncio.Semaphore,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Send one request with the provider's SDK under the shared semaphore."""
+        async with sem:
+            if self._is_anthropic_client():
+                response = await self.llm_client.messages.create(
+                    model=self.model_name,
+                    system=[{
+                        "type": "text",
+                        "text": system_prompt,
+                        "cache_control": {"type": "ephemeral", "ttl": config.PROMPT_CACHE_TTL}
+                    }],
+                    messages=[{"role": "user", "content": user_prompt}],
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+                return response.content[0].text
+            
+            response = await self.llm_client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            return response.choices[0].message.content
+    
     def log_progress(self, message: str, level: str = "info"):
         """Log progress message."""
-        log_method = getattr(self.logger, level, self.logger.info)
-        log_method(f"[{self.name}] {message}")
+        self._log.get(level, self._log["info"])(f"[{self.name}] {message}")
 
 
-class AgentMessage(BaseModel):
+@dataclass(slots=True)
+class AgentMessage:
     """Message passed between agents."""
     
     from_agent: str
     to_agent: str
-    timestamp: datetime = Field(default_factory=datetime.now)
     content: Dict[str, Any]
+    timestamp: datetime = field(default_factory=datetime.now)
     message_type: str = "data"  # data, request, response, error
     priority: int = 1  # 1=low, 5=high
+    
+    def dict(self) -> Dict[str, Any]:
+        """Serialize to a plain dictionary."""
+        return asdict(self)
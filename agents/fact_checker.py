@@ -1,9 +1,65 @@
 """Fact-Checker Agent - Verifies claims and assigns confidence scores."""
 
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any, List, Tuple
 from agents.base_agent import BaseAgent
+from utils.cache_system import semantic_cache
+from utils.json_utils import parse_llm_json
 import json
-from collections import Counter
+import re
+from collections import Counter, defaultdict, namedtuple
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Fact type tags used in (fact, source, type) records before dict conversion
+_FACT, _STATISTIC = 0, 1
+_FACT_TYPE_NAMES = ("fact", "statistic")
+
+
+# Fixed-schema view of the summary fields the fact checker reads
+Summary = namedtuple('Summary', 'url title key_facts statistics')
+
+
+def _normalize_summaries(summaries: List[Dict[str, Any]]) -> List[Summary]:
+    """Convert summary dicts to Summary records once at ingress."""
+    return [
+        Summary(
+            s.get("url", ""),
+            s.get("title", ""),
+            s.get("key_facts") or (),
+            s.get("statistics") or ()
+        )
+        for s in summaries
+    ]
+
+
+def _normalize_fact(fact: Any) -> str:
+    """Normalize a fact string for duplicate detection."""
+    return _WHITESPACE_RE.sub(' ', str(fact).lower().strip(' .,:;'))
+
+
+FACT_CHECK_SYSTEM_PROMPT = """You are a fact verification expert. Analyze the given facts and:
+1. Identify similar or duplicate claims
+2. Detect contradictions
+3. Assign confidence scores (0-100) based on:
+   - Number of sources supporting the claim
+   - Specificity and detail
+   - Presence of data/numbers
+   - Absence of contradictions
+
+Refer to each fact by its number instead of repeating its text; for
+duplicate claims, keep only the first number. Respond in JSON format:
+{
+    "verified_facts": [
+        {
+            "index": 1,
+            "confidence_score": 85,
+            "supporting_sources": 3,
+            "has_contradiction": false
+        }
+    ]
+}"""
 
 
 class FactCheckerAgent(BaseAgent):
@@ -36,29 +92,19 @@ class FactCheckerAgent(BaseAgent):
         
         self.log_progress(f"Fact-checking across {len(summaries)} sources")
         
-        # Extract all facts from summaries
-        all_facts = []
-        for summary in summaries:
-            facts = summary.get("key_facts", [])
-            stats = summary.get("statistics", [])
-            url = summary.get("url", "")
-            
-            for fact in facts:
-                all_facts.append({
-                    "fact": fact,
-                    "source": url,
-                    "type": "fact"
-                })
-                
-            for stat in stats:
-                all_facts.append({
-                    "fact": stat,
-                    "source": url,
-                    "type": "statistic"
-                })
+        # Extract all facts from summaries as (fact, source, type) records
+        all_facts: List[Tuple[Any, str, int]] = []
+        extend = all_facts.extend
+        for summary in _normalize_summaries(summaries):
+            url = summary.url
+            extend((fact, url, _FACT) for fact in summary.key_facts)
+            extend((stat, url, _STATISTIC) for stat in summary.statistics)
                 
         self.log_progress(f"Extracted {len(all_facts)} facts")
         
+        all_facts = self._deduplicate_facts(all_facts)
+        self.log_progress(f"{len(all_facts)} unique facts after deduplication")
+        
         # Group similar facts and check for contradictions
         verified_facts = await self._verify_facts(all_facts)
         
@@ -87,6 +133,29 @@ class FactCheckerAgent(BaseAgent):
             "total_sources": len(summaries)
         }
         
+    def _deduplicate_facts(self, facts: List[Tuple[Any, str, int]]) -> List[Dict[str, Any]]:
+        """
+        Collapse facts quoted by several sources into one entry per claim.
+        
+        Args:
+            facts: List of (fact, source, type tag) records
+            
+        Returns:
+            List of fact dictionaries with all supporting "sources"
+        """
+        groups: Dict[str, List[Tuple[Any, str, int]]] = defaultdict(list)
+        for record in facts:
+            groups[_normalize_fact(record[0])].append(record)
+            
+        return [
+            {
+                "fact": group[0][0],
+                "sources": [source for _, source, _ in group],
+                "type": _FACT_TYPE_NAMES[group[0][2]]
+            }
+            for group in groups.values()
+        ]
+        
     async def _verify_facts(self, facts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Verify facts using LLM to group similar claims and detect contradictions.
@@ -106,19 +175,26 @@ class FactCheckerAgent(BaseAgent):
             fact_type = fact.get("type", "fact")
             fact_groups[fact_type].append(fact)
             
-        verified = []
+        # Batch facts for verification; batches are independent so they
+        # are verified concurrently (bounded by BaseAgent's per-loop LLM semaphore)
+        batch_size = 10
+        batches = [
+            group_facts[i:i+batch_size]
+            for group_facts in fact_groups.values()
+            for i in range(0, len(group_facts), batch_size)
+        ]
         
-        # Process each group
-        for fact_type, group_facts in fact_groups.items():
-            if not group_facts:
-                continue
-                
-            # Batch facts for verification
-            batch_size = 10
-            for i in range(0, len(group_facts), batch_size):
-                batch = group_facts[i:i+batch_size]
-                verified_batch = await self._verify_fact_batch(batch)
-                verified.extend(verified_batch)
+        results = await asyncio.gather(
+            *[self._verify_fact_batch(batch) for batch in batches],
+            return_exceptions=True
+        )
+        
+        verified = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Fact verification failed: {result}")
+                result = self._fallback_verification(batch)
+            verified.extend(result)
                 
         return verified
         
@@ -127,70 +203,74 @@ class FactCheckerAgent(BaseAgent):
         
         # Prepare facts for LLM
         facts_text = "\n".join([
-            f"{i+1}. {f['fact']} (Source: {f['source']})"
+            f"{i+1}. {f['fact']} (Sources: {', '.join(f['sources'])})"
             for i, f in enumerate(fact_batch)
         ])
         
-        system_prompt = """You are a fact verification expert. Analyze the given facts and:
-1. Identify similar or duplicate claims
-2. Detect contradictions
-3. Assign confidence scores (0-100) based on:
-   - Number of sources supporting the claim
-   - Specificity and detail
-   - Presence of data/numbers
-   - Absence of contradictions
-
-Respond in JSON format:
-{
-    "verified_facts": [
-        {
-            "fact": "the main claim",
-            "confidence_score": 85,
-            "supporting_sources": 3,
-            "has_contradiction": false,
-            "notes": "explanation"
-        }
-    ]
-}"""
+        # Static instructions first, facts last, to keep the shared prefix cacheable
+        user_prompt = f"""Please analyze these facts and provide confidence scores.
 
-        user_prompt = f"""Facts to verify:
+Facts to verify:
 
-{facts_text}
-
-Please analyze these facts and provide confidence scores."""
+{facts_text}"""
 
+        # Items are a fixed-size index and scores (no echoed text), so output
+        # size scales with the batch; don't reserve 2000 tokens for 2 facts
+        max_tokens = min(2000, 120 + 40 * len(fact_batch))
+        
         try:
-            response = await self._call_llm(system_prompt, user_prompt)
-            result = json.loads(response)
-            return result.get("verified_facts", [])
+            response = await self._call_llm(
+                FACT_CHECK_SYSTEM_PROMPT, user_prompt, max_tokens=max_tokens
+            )
+            result = parse_llm_json(response)
+            return self._join_verdicts(fact_batch, result.get("verified_facts", []))
+            
+        except json.JSONDecodeError as e:
+            self.logger.error(f"Fact verification returned invalid JSON: {e}; response: {(response or '')[:500]}")
+            return self._fallback_verification(fact_batch)
             
         except Exception as e:
             self.logger.error(f"Fact verification failed: {e}")
+            return self._fallback_verification(fact_batch)
             
-            # Fallback: simple source counting
-            return [
-                {
-                    "fact": f["fact"],
-                    "confidence_score": 50,
-                    "supporting_sources": 1,
-                    "has_contradiction": False,
-                    "source": f["source"]
-                }
-                for f in fact_batch
-            ]
+    def _join_verdicts(self, fact_batch: List[Dict], verdicts: List[Dict]) -> List[Dict]:
+        """Attach the LLM's per-index scores to the facts they refer to."""
+        verified = []
+        for verdict in verdicts:
+            index = verdict.get("index")
+            if not isinstance(index, int) or not 1 <= index <= len(fact_batch):
+                continue
+            f = fact_batch[index - 1]
+            verified.append({
+                "fact": f["fact"],
+                "confidence_score": verdict.get("confidence_score", 0),
+                "supporting_sources": verdict.get("supporting_sources", len(f["sources"])),
+                "has_contradiction": verdict.get("has_contradiction", False),
+                "source": f["sources"][0]
+            })
+        return verified
+        
+    def _fallback_verification(self, fact_batch: List[Dict]) -> List[Dict]:
+        """Fallback: simple source counting when the LLM is unavailable."""
+        return [
+            {
+                "fact": f["fact"],
+                "confidence_score": min(100, 40 + 15 * len(f["sources"])),
+                "supporting_sources": len(f["sources"]),
+                "has_contradiction": False,
+                "source": f["sources"][0]
+            }
+            for f in fact_batch
+        ]
             
-    async def _call_llm(self, system_prompt: str, user_prompt: str) -> str:
+    @semantic_cache(threshold=0.92)
+    async def _call_llm(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 2000
+    ) -> str:
         """Call the LLM."""
-        if not self.llm_client:
-            raise ValueError("LLM client not configured")
-            
-        response = await self.llm_client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.2,
-            max_tokens=2000
+        return await self._chat_completion(
+            system_prompt, user_prompt, temperature=0.2, max_tokens=max_tokens
         )
-        return response.choices[0].message.content
@@ -2,7 +2,41 @@
 
 from typing import Dict, Any, List
 from agents.base_agent import BaseAgent
+from utils.cache_system import semantic_cache
+from utils.json_utils import parse_llm_json
 import json
+from collections import namedtuple
+from itertools import chain, islice
+
+
+GAP_ANALYSIS_SYSTEM_PROMPT = """You are a research gap analyst. Compare the research outline with collected facts to identify:
+1. Topics in the outline not covered by facts
+2. Key questions not answered
+3. Areas needing more depth
+4. Missing perspectives or data
+
+Provide response in JSON:
+{
+    "coverage_score": 75,
+    "gaps": [
+        {
+            "topic": "missing topic",
+            "severity": "high|medium|low",
+            "description": "what's missing"
+        }
+    ],
+    "additional_queries": ["search query 1", "search query 2"],
+    "recommendations": ["recommendation 1", "recommendation 2"]
+}"""
+
+
+# Fixed-schema view of the verified-fact fields the gap finder reads
+Fact = namedtuple('Fact', 'text confidence')
+
+
+def _normalize_facts(facts) -> List[Fact]:
+    """Convert verified fact dicts to Fact records."""
+    return [Fact(f.get('fact', ''), f.get('confidence_score', 0)) for f in facts]
 
 
 class GapFinderAgent(BaseAgent):
@@ -69,40 +103,20 @@ class GapFinderAgent(BaseAgent):
         Use LLM to analyze gaps between outline and collected facts.
         """
         # Format outline
-        outline_text = "\n".join([
-            f"## {section}\n" + "\n".join([f"- {point}" for point in points])
+        outline_text = "\n".join(chain.from_iterable(
+            (f"## {section}", *(f"- {point}" for point in points))
             for section, points in outline.items()
-        ])
+        ))
         
         # Format facts
-        facts_text = "\n".join([
-            f"- {f.get('fact', '')} (confidence: {f.get('confidence_score', 0)}%)"
-            for f in facts[:50]  # Limit to top 50 facts
-        ])
+        facts_text = "\n".join(
+            f"- {f.text} (confidence: {f.confidence}%)"
+            for f in _normalize_facts(islice(facts, 50))  # Limit to top 50 facts
+        )
         
         # Format questions
         questions_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(questions)])
         
-        system_prompt = """You are a research gap analyst. Compare the research outline with collected facts to identify:
-1. Topics in the outline not covered by facts
-2. Key questions not answered
-3. Areas needing more depth
-4. Missing perspectives or data
-
-Provide response in JSON:
-{
-    "coverage_score": 75,
-    "gaps": [
-        {
-            "topic": "missing topic",
-            "severity": "high|medium|low",
-            "description": "what's missing"
-        }
-    ],
-    "additional_queries": ["search query 1", "search query 2"],
-    "recommendations": ["recommendation 1", "recommendation 2"]
-}"""
-
         user_prompt = f"""Research Outline:
 {outline_text}
 
@@ -114,35 +128,39 @@ Collected Facts ({len(facts)} total):
 
 Analyze the gaps and suggest additional research."""
 
+        # Output size scales with the number of facts shown to the LLM
+        max_tokens = min(2000, 400 + 10 * min(len(facts), 50))
+        
         try:
-            response = await self._call_llm(system_prompt, user_prompt)
-            return json.loads(response)
+            response = await self._call_llm(
+                GAP_ANALYSIS_SYSTEM_PROMPT, user_prompt, max_tokens=max_tokens
+            )
+            return parse_llm_json(response)
+            
+        except json.JSONDecodeError as e:
+            self.logger.error(f"Gap analysis returned invalid JSON: {e}; response: {(response or '')[:500]}")
             
         except Exception as e:
             self.logger.error(f"Gap analysis failed: {e}")
             
-            # Fallback: simple heuristic
-            coverage = min(100, (len(facts) / max(len(questions), 5)) * 100)
-            
-            return {
-                "coverage_score": coverage,
-                "gaps": [],
-                "additional_queries": questions[:3],  # Use original questions
-                "recommendations": ["Collect more diverse sources"]
-            }
+        # Fallback: simple heuristic
+        coverage = min(100, (len(facts) / max(len(questions), 5)) * 100)
+        
+        return {
+            "coverage_score": coverage,
+            "gaps": [],
+            "additional_queries": questions[:3],  # Use original questions
+            "recommendations": ["Collect more diverse sources"]
+        }
             
-    async def _call_llm(self, system_prompt: str, user_prompt: str) -> str:
+    @semantic_cache(threshold=0.92)
+    async def _call_llm(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 2000
+    ) -> str:
         """Call the LLM."""
-        if not self.llm_client:
-            raise ValueError("LLM client not configured")
-            
-        response = await self.llm_client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.5,
-            max_tokens=2000
+        return await self._chat_completion(
+            system_prompt, user_prompt, temperature=0.5, max_tokens=max_tokens
         )
-        return response.choices[0].message.content
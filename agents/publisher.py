@@ -1,19 +1,243 @@
 """Publisher Agent - Converts reports to various output formats."""
 
-from typing import Dict, Any
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Callable, List
+from functools import lru_cache
+from io import BytesIO
+import re
+from types import SimpleNamespace
 from agents.base_agent import BaseAgent
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-import markdown
+from utils.markdown_tokens import Token, tokenize_markdown
 from pathlib import Path
+import html
 import config
 
+try:
+    import pdfkit
+    PDFKIT_AVAILABLE = True
+except ImportError:
+    PDFKIT_AVAILABLE = False
+
+
+MARKDOWN_WRITE_BUFFER = 1 << 20
+
+# Anything but word characters (str.isalnum() or "_"), spaces and hyphens
+_FNAME_CLEAN = re.compile(r'[^\w\- ]+')
+
+# Reports longer than this are rendered by wkhtmltopdf (via pdfkit) when available
+PDFKIT_MIN_CHARS = 50_000
+
+# Escapes ReportLab paragraph markup in a single pass
+_XML_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+
+# Document libraries are imported on first export of their format, so
+# Markdown-only runs don't pay for loading ReportLab or python-docx
+@lru_cache(maxsize=1)
+def _reportlab() -> SimpleNamespace:
+    """Import the ReportLab names used for PDF export."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    
+    return SimpleNamespace(
+        letter=letter,
+        getSampleStyleSheet=getSampleStyleSheet,
+        ParagraphStyle=ParagraphStyle,
+        inch=inch,
+        SimpleDocTemplate=SimpleDocTemplate,
+        Paragraph=Paragraph,
+        Spacer=Spacer,
+        PageBreak=PageBreak,
+        TA_CENTER=TA_CENTER,
+        TA_JUSTIFY=TA_JUSTIFY
+    )
+
+
+@lru_cache(maxsize=1)
+def _docx() -> SimpleNamespace:
+    """Import the python-docx names used for DOCX export."""
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    
+    return SimpleNamespace(Document=Document, WD_ALIGN_PARAGRAPH=WD_ALIGN_PARAGRAPH)
+
+
+@lru_cache(maxsize=None)
+def _pdf_styles() -> Dict[str, Any]:
+    """Build the ReportLab paragraph styles once per process."""
+    rl = _reportlab()
+    ParagraphStyle, TA_CENTER, TA_JUSTIFY = rl.ParagraphStyle, rl.TA_CENTER, rl.TA_JUSTIFY
+    styles = rl.getSampleStyleSheet()
+    
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor='#2C3E50',
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor='#34495E',
+        spaceAfter=12,
+        spaceBefore=12
+    )
+    
+    body_style = ParagraphStyle(
+        'CustomBody',
+        parent=styles['BodyText'],
+        fontSize=11,
+        alignment=TA_JUSTIFY,
+        spaceAfter=12
+    )
+    
+    return {
+        "normal": styles['Normal'],
+        "title": title_style,
+        "heading": heading_style,
+        "body": body_style,
+    }
+
+
+@lru_cache(maxsize=None)
+def _docx_template() -> bytes:
+    """Serialize python-docx's default template once per process."""
+    buffer = BytesIO()
+    _docx().Document().save(buffer)
+    return buffer.getvalue()
+
+
+def _render_pdf(output_path: str, tokens: List[Token], title: str, date: str):
+    """
+    Build the PDF with ReportLab.
+    
+    Module-level with plain arguments so it can run in a worker process.
+    """
+    rl = _reportlab()
+    Paragraph, Spacer, inch = rl.Paragraph, rl.Spacer, rl.inch
+    
+    # Create PDF
+    doc = rl.SimpleDocTemplate(
+        output_path,
+        pagesize=rl.letter,
+        rightMargin=inch,
+        leftMargin=inch,
+        topMargin=inch,
+        bottomMargin=inch
+    )
+    
+    # Styles
+    styles = _pdf_styles()
+    title_style = styles["title"]
+    heading_style = styles["heading"]
+    body_style = styles["body"]
+    
+    # Build content
+    story = []
+    
+    # Title page
+    story.append(Spacer(1, 2*inch))
+    story.append(Paragraph(title, title_style))
+    story.append(Spacer(1, 0.5*inch))
+    story.append(Paragraph(
+        f"Generated: {date}",
+        styles["normal"]
+    ))
+    story.append(rl.PageBreak())
+    
+    # Token kind -> flowable; only body text needs ReportLab escaping
+    handlers = {
+        "h1": lambda text: Paragraph(text, title_style),
+        "h2": lambda text: Paragraph(text, heading_style),
+        "h3": lambda text: Paragraph(text, heading_style),
+        "p": lambda text: Paragraph(text.translate(_XML_ESCAPE_TABLE), body_style),
+        "hr": lambda text: Spacer(1, 0.3*inch),
+        "blank": lambda text: Spacer(1, 0.2*inch)
+    }
+    
+    story.extend(handlers[kind](text) for kind, text in tokens)
+    
+    # Build PDF
+    doc.build(story)
+
+
+def _render_docx(output_path: str, tokens: List[Token], title: str, date: str):
+    """
+    Build the DOCX with python-docx.
+    
+    Module-level with plain arguments so it can run in a worker process.
+    """
+    dx = _docx()
+    WD_ALIGN_PARAGRAPH = dx.WD_ALIGN_PARAGRAPH
+    
+    # Create document from the in-memory template
+    doc = dx.Document(BytesIO(_docx_template()))
+    
+    # Resolve paragraph styles once instead of per add_heading() call
+    heading_styles = {
+        level: doc.styles[f"Heading {level}"] for level in (1, 2, 3)
+    }
+    
+    # Add title
+    title_para = doc.add_heading(title, 0)
+    title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Add metadata
+    date_para = doc.add_paragraph(f"Generated: {date}")
+    date_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    doc.add_page_break()
+    
+    def add_body(text):
+        doc.add_paragraph(text).alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        
+    # Token kind -> builder; blank lines add nothing
+    handlers = {
+        "h1": lambda text: doc.add_paragraph(text, heading_styles[1]),
+        "h2": lambda text: doc.add_paragraph(text, heading_styles[2]),
+        "h3": lambda text: doc.add_paragraph(text, heading_styles[3]),
+        "p": add_body,
+        "hr": lambda text: doc.add_paragraph(),
+        "blank": lambda text: None
+    }
+    
+    for kind, text in tokens:
+        handlers[kind](text)
+        
+    # Save
+    doc.save(output_path)
+
+
+# Shared worker processes for CPU-bound PDF/DOCX rendering
+# Exports are rare and a run renders at most a PDF and a DOCX
+RENDER_POOL_WORKERS = min(2, os.cpu_count() or 1)
+
+_render_pool = None
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Get singleton render process pool."""
+    global _render_pool
+    if _render_pool is None:
+        # spawn, not fork: the server process runs background threads (event
+        # loop, usage flusher, token cleanup) whose locks a fork would copy held
+        _render_pool = ProcessPoolExecutor(
+            max_workers=RENDER_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _render_pool
+
 
 class PublisherAgent(BaseAgent):
     """
@@ -22,6 +246,7 @@ class PublisherAgent(BaseAgent):
     
     def __init__(self, llm_client=None):
         super().__init__("PublisherAgent", llm_client)
+        config.ensure_dirs()
         
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -49,8 +274,7 @@ class PublisherAgent(BaseAgent):
         filename = input_data.get("output_filename", "research_report")
         
         # Sanitize filename
-        filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_'))
-        filename = filename.replace(' ', '_')
+        filename = _FNAME_CLEAN.sub('', filename).replace(' ', '_')
         
         self.log_progress(f"Publishing to formats: {', '.join(formats)}")
         
@@ -61,12 +285,17 @@ class PublisherAgent(BaseAgent):
             md_path = await self._export_markdown(report, filename)
             output_files["markdown"] = str(md_path)
             
+        # Parse the final (edited, cited) Markdown once for every structured format
+        tokens = None
+        if "pdf" in formats or "docx" in formats:
+            tokens = tokenize_markdown(report)
+            
         if "pdf" in formats:
-            pdf_path = await self._export_pdf(report, metadata, filename)
+            pdf_path = await self._export_pdf(report, tokens, metadata, filename)
             output_files["pdf"] = str(pdf_path)
             
         if "docx" in formats:
-            docx_path = await self._export_docx(report, metadata, filename)
+            docx_path = await self._export_docx(tokens, metadata, filename)
             output_files["docx"] = str(docx_path)
             
         self.log_progress(f"Published {len(output_files)} formats")
@@ -81,8 +310,12 @@ class PublisherAgent(BaseAgent):
         
         output_path = config.REPORTS_DIR / f"{filename}.md"
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(report)
+        # Binary handle with a 1 MiB buffer: one encode, no text-layer copies,
+        # then buffer-sized zero-copy slices of the encoded bytes
+        data = memoryview(report.encode('utf-8'))
+        with open(output_path, 'wb', buffering=MARKDOWN_WRITE_BUFFER) as f:
+            for offset in range(0, len(data), MARKDOWN_WRITE_BUFFER):
+                f.write(data[offset:offset + MARKDOWN_WRITE_BUFFER])
             
         self.log_progress(f"Saved Markdown: {output_path}")
         return output_path
@@ -90,6 +323,7 @@ class PublisherAgent(BaseAgent):
     async def _export_pdf(
         self,
         report: str,
+        tokens: List[Token],
         metadata: Dict,
         filename: str
     ) -> Path:
@@ -97,91 +331,70 @@ class PublisherAgent(BaseAgent):
         
         output_path = config.REPORTS_DIR / f"{filename}.pdf"
         
-        # Create PDF
-        doc = SimpleDocTemplate(
-            str(output_path),
-            pagesize=letter,
-            rightMargin=inch,
-            leftMargin=inch,
-            topMargin=inch,
-            bottomMargin=inch
-        )
+        # Large reports: let the native HTML renderer do the layout
+        if PDFKIT_AVAILABLE and len(report) > PDFKIT_MIN_CHARS:
+            # wkhtmltopdf runs as a blocking subprocess; keep it off the event loop
+            if await asyncio.to_thread(self._export_pdf_html, report, metadata, output_path):
+                self.log_progress(f"Saved PDF: {output_path}")
+                return output_path
+                
+        title = metadata.get("title", "Research Report")
+        date = str(metadata.get("date", "N/A"))
+        await self._render(_render_pdf, str(output_path), tokens, title, date)
         
-        # Styles
-        styles = getSampleStyleSheet()
+        self.log_progress(f"Saved PDF: {output_path}")
+        return output_path
         
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor='#2C3E50',
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
+    async def _render(self, render: Callable, *args):
+        """
+        Run a document renderer in the shared process pool.
         
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor='#34495E',
-            spaceAfter=12,
-            spaceBefore=12
-        )
+        ReportLab and python-docx are pure Python and hold the GIL, so they
+        run out of process to keep the event loop responsive.
+        """
+        global _render_pool
+        loop = asyncio.get_running_loop()
         
-        body_style = ParagraphStyle(
-            'CustomBody',
-            parent=styles['BodyText'],
-            fontSize=11,
-            alignment=TA_JUSTIFY,
-            spaceAfter=12
-        )
+        try:
+            await loop.run_in_executor(get_render_pool(), render, *args)
+        except BrokenProcessPool as e:
+            # A worker died (or processes can't be spawned); retry in a thread
+            self.log_progress(f"Render pool failed, rendering in-process: {e}", "warning")
+            _render_pool = None
+            await asyncio.to_thread(render, *args)
+            
+    def _export_pdf_html(self, report: str, metadata: Dict, output_path: Path) -> bool:
+        """
+        Render the report to PDF through markdown -> HTML -> wkhtmltopdf.
         
-        # Build content
-        story = []
+        Returns:
+            False if wkhtmltopdf is unavailable or fails, so the caller can
+            fall back to ReportLab
+        """
+        import markdown
         
-        # Title page
-        title = metadata.get("title", "Research Report")
-        story.append(Spacer(1, 2*inch))
-        story.append(Paragraph(title, title_style))
-        story.append(Spacer(1, 0.5*inch))
-        story.append(Paragraph(
-            f"Generated: {metadata.get('date', 'N/A')}",
-            styles['Normal']
-        ))
-        story.append(PageBreak())
-        
-        # Parse report content
-        for line in report.split('\n'):
-            line = line.strip()
-            
-            if not line:
-                story.append(Spacer(1, 0.2*inch))
-                continue
-                
-            # Handle markdown headings
-            if line.startswith('# '):
-                text = line.lstrip('#').strip()
-                story.append(Paragraph(text, title_style))
-            elif line.startswith('## '):
-                text = line.lstrip('#').strip()
-                story.append(Paragraph(text, heading_style))
-            elif line.startswith('---'):
-                story.append(Spacer(1, 0.3*inch))
-            else:
-                # Regular paragraph
-                # Escape special characters for ReportLab
-                line = line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                story.append(Paragraph(line, body_style))
-                
-        # Build PDF
-        doc.build(story)
+        title = html.escape(metadata.get("title", "Research Report"))
+        date = html.escape(str(metadata.get("date", "N/A")))
+        body = markdown.markdown(report, extensions=['extra'])
         
-        self.log_progress(f"Saved PDF: {output_path}")
-        return output_path
+        page = (
+            f"<html><head><meta charset=\"utf-8\"><title>{title}</title></head><body>"
+            f"<h1 style=\"text-align:center\">{title}</h1>"
+            f"<p style=\"text-align:center\">Generated: {date}</p>"
+            f"<div style=\"page-break-after:always\"></div>"
+            f"{body}</body></html>"
+        )
         
+        try:
+            pdfkit.from_string(page, str(output_path), options={'quiet': '', 'encoding': 'UTF-8'})
+            return True
+        except OSError as e:
+            self.log_progress(f"wkhtmltopdf rendering failed, using ReportLab: {e}", "warning")
+            return False
+            
     async def _export_docx(
         self,
-        report: str,
+        tokens: List[Token],
         metadata: Dict,
         filename: str
     ) -> Path:
@@ -189,41 +402,9 @@ class PublisherAgent(BaseAgent):
         
         output_path = config.REPORTS_DIR / f"{filename}.docx"
         
-        # Create document
-        doc = Document()
-        
-        # Add title
         title = metadata.get("title", "Research Report")
-        title_para = doc.add_heading(title, 0)
-        title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Add metadata
-        date_para = doc.add_paragraph(f"Generated: {metadata.get('date', 'N/A')}")
-        date_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        doc.add_page_break()
-        
-        # Parse and add content
-        for line in report.split('\n'):
-            line = line.strip()
-            
-            if not line:
-                continue
-                
-            if line.startswith('# '):
-                doc.add_heading(line.lstrip('#').strip(), 1)
-            elif line.startswith('## '):
-                doc.add_heading(line.lstrip('#').strip(), 2)
-            elif line.startswith('### '):
-                doc.add_heading(line.lstrip('#').strip(), 3)
-            elif line.startswith('---'):
-                doc.add_paragraph()
-            else:
-                para = doc.add_paragraph(line)
-                para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-                
-        # Save
-        doc.save(output_path)
+        date = str(metadata.get("date", "N/A"))
+        await self._render(_render_docx, str(output_path), tokens, title, date)
         
         self.log_progress(f"Saved DOCX: {output_path}")
         return output_path
@@ -1,7 +1,9 @@
 """Query Expansion Agent - Breaks down user queries into research sub-topics."""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from agents.base_agent import BaseAgent
+from utils.cache_system import get_result_cache
+from utils.json_utils import parse_llm_json
 import json
 
 
@@ -35,6 +37,14 @@ class QueryExpansionAgent(BaseAgent):
         
         self.log_progress(f"Expanding query: {query}")
         
+        cache = get_result_cache("query_expansion")
+        cache_key = cache.make_key(query.strip().lower())
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            self.log_progress("Using cached query expansion")
+            cached["original_query"] = query
+            return cached
+            
         # Create prompt for LLM
         system_prompt = """You are a research planning expert. Your job is to analyze a research topic 
 and break it down into comprehensive sub-topics, key questions, and a structured outline.
@@ -59,12 +69,16 @@ Please expand this topic into:
 
 Focus on creating a comprehensive research plan that covers all important dimensions of the topic."""
 
-        # Call LLM
+        # Call LLM; None means it failed and the canned outline is used (uncached)
         response = await self._call_llm(system_prompt, user_prompt)
         
         # Parse response
         try:
-            result = json.loads(response)
+            if response is None:
+                result = parse_llm_json(self._create_fallback_response())
+            else:
+                result = parse_llm_json(response)
+                await cache.aset(cache_key, result)
         except json.JSONDecodeError:
             # Fallback parsing if JSON is malformed
             self.log_progress("Failed to parse JSON, using fallback", "warning")
@@ -90,28 +104,19 @@ Focus on creating a comprehensive research plan that covers all important dimens
             "key_questions": ["What is the topic about?", "How does it work?", "What are its applications?", "What are the current developments?", "What does the future hold?"]
         }'''
         
-    async def _call_llm(self, system_prompt: str, user_prompt: str) -> str:
-        """Call the LLM with prompts."""
+    async def _call_llm(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        """Call the LLM with prompts; None if the call failed."""
         if not self.llm_client:
             raise ValueError("LLM client not configured")
             
         try:
-            # Try OpenAI-compatible API (works for Groq, DeepSeek, OpenAI, etc.)
-            response = await self.llm_client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2000
+            return await self._chat_completion(
+                system_prompt, user_prompt, temperature=0.7, max_tokens=2000
             )
-            return response.choices[0].message.content
             
         except Exception as e:
             self.logger.error(f"LLM call failed: {e}")
-            # Return fallback result instead of raising
-            return self._create_fallback_response()
+            return None
             
     def _fallback_parse(self, response: str, query: str) -> Dict[str, Any]:
         """Fallback parser if JSON parsing fails."""
@@ -1,9 +1,49 @@
 """Search Agent - Performs multi-round web searches."""
 
 from typing import Dict, Any, List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from agents.base_agent import BaseAgent
 from utils.search import MultiSearch
 
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+
+_TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src"
+})
+
+
+def _canonical_url(url: str) -> str:
+    """
+    Canonicalize a URL for duplicate detection.
+    
+    Drops the scheme, fragment, a leading "www.", trailing slashes and
+    tracking query parameters; the host is lowercased.
+    """
+    parts = urlsplit(url)
+    netloc = parts.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    query = parts.query
+    if query:
+        query = urlencode([
+            (k, v) for k, v in parse_qsl(query, keep_blank_values=True)
+            if not k.startswith("utm_") and k not in _TRACKING_PARAMS
+        ])
+    return urlunsplit(("", netloc, parts.path.rstrip("/"), query, ""))
+
+
+def _url_fingerprint(url: str) -> int:
+    """64-bit fingerprint of the canonical URL."""
+    canon = _canonical_url(url)
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh64_intdigest(canon.encode("utf-8"))
+    return hash(canon)
+
 
 class SearchAgent(BaseAgent):
     """
@@ -21,7 +61,9 @@ class SearchAgent(BaseAgent):
         Args:
             input_data: {
                 "queries": List[str] - Search queries
-                "max_results_per_query": int (optional) - Results per query
+                "max_results_per_query": int (optional) - Results per query,
+                "seed_results": List[Dict] (optional) - Results already fetched
+                    (e.g. a prefetch); kept first and deduplicated with the rest
             }
             
         Returns:
@@ -38,9 +80,20 @@ class SearchAgent(BaseAgent):
         
         self.log_progress(f"Executing {len(queries)} searches")
         
-        all_results = []
+        # Deduplicate by canonical URL fingerprint as results arrive
+        unique_results = []
+        seen_urls = set()
         executed_queries = []
         
+        for result in input_data.get("seed_results", []):
+            url = result.get("url")
+            if not url:
+                continue
+            fingerprint = _url_fingerprint(url)
+            if fingerprint not in seen_urls:
+                seen_urls.add(fingerprint)
+                unique_results.append(result)
+        
         for query in queries:
             self.log_progress(f"Searching: {query}")
             
@@ -49,7 +102,13 @@ class SearchAgent(BaseAgent):
                 
                 # Convert to dict format
                 for result in results:
-                    all_results.append(result.to_dict())
+                    url = result.url
+                    if not url:
+                        continue
+                    fingerprint = _url_fingerprint(url)
+                    if fingerprint not in seen_urls:
+                        seen_urls.add(fingerprint)
+                        unique_results.append(result.to_dict())
                     
                 executed_queries.append(query)
                 self.log_progress(f"Found {len(results)} results for: {query}")
@@ -58,16 +117,6 @@ class SearchAgent(BaseAgent):
                 self.logger.error(f"Search failed for '{query}': {e}")
                 continue
                 
-        # Deduplicate by URL
-        unique_results = []
-        seen_urls = set()
-        
-        for result in all_results:
-            url = result.get("url")
-            if url and url not in seen_urls:
-                seen_urls.add(url)
-                unique_results.append(result)
-                
         self.log_progress(f"Total unique results: {len(unique_results)}")
         
         return {
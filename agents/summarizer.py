@@ -1,9 +1,13 @@
 """Summarizer Agent - Extracts and summarizes content from web pages."""
 
+import asyncio
 from typing import Dict, Any, List
 from agents.base_agent import BaseAgent
 from utils.scraper import scrape_multiple
+from utils.cache_system import get_result_cache
+from utils.json_utils import parse_llm_json
 import json
+import config
 
 
 class SummarizerAgent(BaseAgent):
@@ -21,7 +25,8 @@ class SummarizerAgent(BaseAgent):
         Args:
             input_data: {
                 "search_results": List[Dict] - Results from SearchAgent,
-                "max_urls": int (optional) - Max URLs to process
+                "max_urls": int (optional) - Max URLs to process,
+                "summary_concurrency": int (optional) - Max concurrent LLM calls
             }
             
         Returns:
@@ -46,17 +51,29 @@ class SummarizerAgent(BaseAgent):
         
         self.log_progress(f"Successfully scraped {len(scraped_data)} pages")
         
-        # Generate summaries
+        # Generate summaries concurrently, bounded by a semaphore
+        sem = asyncio.Semaphore(
+            input_data.get("summary_concurrency", config.MAX_CONCURRENT_LLM_CALLS)
+        )
+        
+        async def _wrap(data):
+            async with sem:
+                return await self._generate_summary(data)
+                
+        results = await asyncio.gather(
+            *[_wrap(data) for data in scraped_data],
+            return_exceptions=True
+        )
+        
         summaries = []
         failed_urls = []
         
-        for data in scraped_data:
-            try:
-                summary = await self._generate_summary(data)
-                summaries.append(summary)
-            except Exception as e:
-                self.logger.error(f"Failed to summarize {data.get('url')}: {e}")
+        for data, result in zip(scraped_data, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Failed to summarize {data.get('url')}: {result}")
                 failed_urls.append(data.get('url'))
+            else:
+                summaries.append(result)
                 
         self.log_progress(f"Generated {len(summaries)} summaries")
         
@@ -84,6 +101,16 @@ class SummarizerAgent(BaseAgent):
         if len(content) > 8000:
             content = content[:8000] + "..."
             
+        # Scraped content rarely changes between retries; reuse its summary
+        cache = get_result_cache("summaries")
+        cache_key = cache.make_key(content)
+        result = await cache.aget(cache_key)
+        if result is not None:
+            result["url"] = url
+            result["title"] = title
+            result["source_content_length"] = len(content)
+            return result
+            
         system_prompt = """You are an expert at extracting key information from web content.
 Create a concise, factual summary focusing on:
 - Main facts and claims
@@ -109,7 +136,8 @@ Please provide a structured summary of this content."""
 
         try:
             response = await self._call_llm(system_prompt, user_prompt)
-            result = json.loads(response)
+            result = parse_llm_json(response)
+            await cache.aset(cache_key, result)
             
             # Add metadata
             result["url"] = url
@@ -132,16 +160,6 @@ Please provide a structured summary of this content."""
             
     async def _call_llm(self, system_prompt: str, user_prompt: str) -> str:
         """Call the LLM."""
-        if not self.llm_client:
-            raise ValueError("LLM client not configured")
-            
-        response = await self.llm_client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.3,
-            max_tokens=1500
+        return await self._chat_completion(
+            system_prompt, user_prompt, temperature=0.3, max_tokens=1500
         )
-        return response.choices[0].message.content
@@ -1,9 +1,30 @@
 """Writer Agent - Generates structured research reports."""
 
-from typing import Dict, Any, List
+import asyncio
+from collections import namedtuple
+from itertools import islice
+from typing import Dict, Any, Iterator, List
 from agents.base_agent import BaseAgent
 import json
 from datetime import datetime
+import numpy as np
+
+
+# Verified facts as parallel columns: fact text, lowercased text, scores as
+# a float array for vectorized selection, and the raw scores for prompts
+FactColumns = namedtuple('FactColumns', 'texts lowers scores raw_scores')
+
+
+def _fact_columns(facts: List[Dict]) -> FactColumns:
+    """Convert verified fact dicts to a column layout, one dict pass per field."""
+    texts = [f.get('fact', '') for f in facts]
+    raw_scores = [f.get('confidence_score', 0) for f in facts]
+    return FactColumns(
+        texts=texts,
+        lowers=[t.lower() for t in texts],
+        scores=np.fromiter(raw_scores, dtype=np.float64, count=len(raw_scores)),
+        raw_scores=raw_scores
+    )
 
 
 class WriterAgent(BaseAgent):
@@ -46,26 +67,37 @@ class WriterAgent(BaseAgent):
         
         self.log_progress(f"Writing research report for: {query}")
         
-        # Generate each section
-        sections = {}
+        # Extract fact fields once for all sections
+        columns = _fact_columns(facts)
+        
+        # Sections are independent, so generate them all concurrently
+        # (LLM calls are bounded by BaseAgent's per-loop semaphore); dict order is report order
+        tasks = {}
         
         # Executive Summary
-        sections["Executive Summary"] = await self._write_executive_summary(
-            query, facts
-        )
+        tasks["Executive Summary"] = self._write_executive_summary(query, columns)
         
         # Introduction
-        sections["Introduction"] = await self._write_introduction(query, outline)
+        tasks["Introduction"] = self._write_introduction(query, outline)
         
         # Main content sections
         for section_name, section_points in outline.items():
             if section_name not in ["Introduction", "Conclusion"]:
-                sections[section_name] = await self._write_section(
-                    section_name, section_points, facts, summaries
+                tasks[section_name] = self._write_section(
+                    section_name, section_points, columns, summaries
                 )
                 
         # Conclusion
-        sections["Conclusion"] = await self._write_conclusion(query, facts)
+        tasks["Conclusion"] = self._write_conclusion(query, columns)
+        
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        
+        sections = {}
+        for section_name, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Section '{section_name}' failed: {result}")
+                result = "[Content generation failed for this section]"
+            sections[section_name] = result
         
         # Compile full report
         full_report = self._compile_report(query, sections)
@@ -89,19 +121,17 @@ class WriterAgent(BaseAgent):
     async def _write_executive_summary(
         self,
         query: str,
-        facts: List[Dict]
+        columns: FactColumns
     ) -> str:
         """Generate executive summary."""
         
-        top_facts = sorted(
-            facts,
-            key=lambda x: x.get("confidence_score", 0),
-            reverse=True
-        )[:10]
+        # Stable sort keeps ties in input order, like sorted(..., reverse=True)
+        top_idx = np.argsort(-columns.scores, kind='stable')[:10]
         
+        texts = columns.texts
         facts_text = "\n".join([
-            f"- {f.get('fact', '')}"
-            for f in top_facts
+            f"- {texts[i]}"
+            for i in top_idx
         ])
         
         prompt = f"""Write a concise executive summary (150-200 words) for a research report on:
@@ -132,23 +162,28 @@ The introduction should provide context, explain importance, and outline the rep
         self,
         section_name: str,
         section_points: List[str],
-        facts: List[Dict],
+        columns: FactColumns,
         summaries: List[Dict]
     ) -> str:
         """Generate a content section."""
         
-        # Filter relevant facts for this section
-        relevant_facts = [
-            f for f in facts
-            if any(point.lower() in f.get('fact', '').lower() for point in section_points)
-        ][:15]
-        
-        if not relevant_facts:
-            relevant_facts = facts[:10]  # Use general facts
+        # Filter relevant facts for this section, stopping at the first 15
+        points_lc = [point.lower() for point in section_points]
+        relevant_idx = list(islice(
+            (
+                i for i, fact_lc in enumerate(columns.lowers)
+                if any(point in fact_lc for point in points_lc)
+            ),
+            15
+        ))
+        
+        if not relevant_idx:
+            relevant_idx = range(min(10, len(columns.texts)))  # Use general facts
             
+        texts, raw_scores = columns.texts, columns.raw_scores
         facts_text = "\n".join([
-            f"- {f.get('fact', '')} (confidence: {f.get('confidence_score', 0)}%)"
-            for f in relevant_facts
+            f"- {texts[i]} (confidence: {raw_scores[i]}%)"
+            for i in relevant_idx
         ])
         
         points_text = "\n".join([f"- {p}" for p in section_points])
@@ -166,17 +201,15 @@ Write in a professional, informative style with clear structure and data-driven
 
         return await self._generate_content(prompt)
         
-    async def _write_conclusion(self, query: str, facts: List[Dict]) -> str:
+    async def _write_conclusion(self, query: str, columns: FactColumns) -> str:
         """Generate conclusion."""
         
-        high_confidence_facts = [
-            f for f in facts
-            if f.get("confidence_score", 0) >= 80
-        ][:8]
+        high_idx = np.flatnonzero(columns.scores >= 80)[:8]
         
+        texts = columns.texts
         facts_text = "\n".join([
-            f"- {f.get('fact', '')}"
-            for f in high_confidence_facts
+            f"- {texts[i]}"
+            for i in high_idx
         ])
         
         prompt = f"""Write a conclusion (200-300 words) for a research report on:
@@ -204,33 +237,24 @@ and maintain a professional tone. Focus on facts and insights."""
             self.logger.error(f"Content generation failed: {e}")
             return f"[Content generation failed for this section]"
             
-    def _compile_report(self, title: str, sections: Dict[str, str]) -> str:
-        """Compile all sections into final report."""
+    def _iter_report(self, title: str, sections: Dict[str, str]) -> Iterator[str]:
+        """Yield the report parts in order, without building a parts list."""
         
-        report_parts = [
-            f"# {title}",
-            f"\n*Research Report Generated: {datetime.now().strftime('%B %d, %Y')}*\n",
-            "---\n"
-        ]
+        yield f"# {title}"
+        yield f"\n*Research Report Generated: {datetime.now().strftime('%B %d, %Y')}*\n"
+        yield "---\n"
         
         for section_name, content in sections.items():
-            report_parts.append(f"## {section_name}\n")
-            report_parts.append(f"{content}\n")
+            yield f"## {section_name}\n"
+            yield f"{content}\n"
             
-        return "\n".join(report_parts)
+    def _compile_report(self, title: str, sections: Dict[str, str]) -> str:
+        """Compile all sections into final report."""
+        
+        return "\n".join(self._iter_report(title, sections))
         
     async def _call_llm(self, system_prompt: str, user_prompt: str) -> str:
         """Call the LLM."""
-        if not self.llm_client:
-            raise ValueError("LLM client not configured")
-            
-        response = await self.llm_client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1500
+        return await self._chat_completion(
+            system_prompt, user_prompt, temperature=0.7, max_tokens=1500
         )
-        return response.choices[0].message.content
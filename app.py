@@ -4,11 +4,17 @@ Modern web interface for the research platform.
 """
 
 import streamlit as st
+import asyncio
+import aiohttp
+import os
+import re
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 # Setup logging
 logging.basicConfig(
@@ -18,11 +24,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Import authentication
+import config
 from auth.authentication import UserDatabase, UsageTracker, JWTManager, AuthenticationError
 from auth.password_recovery import PasswordRecovery
 
 # Import research components
-from research.research_modes import ResearchModeManager, ResearchMode
+from research.research_modes import ResearchModeManager, ResearchMode, ModeConfig
 from research.query_processor import QueryProcessor
 from utils.search_engines import MultiSourceSearchEngine
 
@@ -35,6 +42,10 @@ from utils.credibility_scorer import get_credibility_scorer
 # Import orchestrator
 from orchestrator.tiered_workflow import TieredResearchOrchestrator
 from models.router import ModelRouter
+from subscription.manager import SubscriptionTier
+
+# Session tier string -> subscription tier
+TIER_ENUMS = {"premium": SubscriptionTier.PREMIUM, "free": SubscriptionTier.FREE}
 
 # Page configuration
 st.set_page_config(
@@ -45,7 +56,7 @@ st.set_page_config(
 )
 
 # Custom CSS for dark theme
-st.markdown("""
+_CSS = """
 <style>
     .main {
         background-color: #1e1e1e;
@@ -82,7 +93,148 @@ st.markdown("""
         margin: 10px 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+def _inject_css():
+    """Emit the theme CSS for this run."""
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+
+# Shared services. Streamlit re-executes this script on every interaction;
+# cache_resource keeps one instance of each per server process instead of
+# rebuilding them per rerun. None of them hold per-user state.
+@st.cache_resource
+def _user_db() -> UserDatabase:
+    return UserDatabase()
+
+
+@st.cache_resource
+def _usage_tracker() -> UsageTracker:
+    return UsageTracker()
+
+
+@st.cache_resource
+def _jwt_manager() -> JWTManager:
+    return JWTManager()
+
+
+@st.cache_resource
+def _password_recovery() -> PasswordRecovery:
+    return PasswordRecovery(_user_db())
+
+
+@st.cache_resource
+def _mode_manager() -> ResearchModeManager:
+    return ResearchModeManager()
+
+
+@st.cache_resource
+def _mode_configs() -> Dict[str, ModeConfig]:
+    manager = _mode_manager()
+    return {mode.value: manager.get_config(mode) for mode in ResearchMode}
+
+
+@st.cache_resource
+def _query_processor() -> QueryProcessor:
+    return QueryProcessor()
+
+
+@st.cache_resource
+def _search_engine() -> MultiSourceSearchEngine:
+    return MultiSourceSearchEngine(session=_http_session())
+
+
+@st.cache_resource
+def _model_router() -> ModelRouter:
+    return ModelRouter()
+
+
+# One persistent event loop for the whole server process; research coroutines
+# from every session are submitted to it, so clients bound to the loop
+# (HTTP sessions, async DB handles) survive across research runs
+@st.cache_resource
+def _event_loop() -> asyncio.AbstractEventLoop:
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="research-loop", daemon=True).start()
+    return loop
+
+
+# Keep-alive HTTP session for the search engines; aiohttp sessions are bound
+# to the loop they are created on, so it is built on the background loop
+@st.cache_resource
+def _http_session() -> aiohttp.ClientSession:
+    async def create() -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=64, keepalive_timeout=30))
+    return asyncio.run_coroutine_threadsafe(create(), _event_loop()).result()
+
+
+# Navigation clicks rerun the whole script; serve the dashboard's profile and
+# usage from a short-lived cache. Cleared whenever usage or the user changes.
+@st.cache_data(ttl=10)
+def _cache_stats() -> Dict[str, Any]:
+    return get_cache(similarity_enabled=True).get_stats()
+
+
+@st.cache_data(ttl=30)
+def _dashboard_snapshot(user_id: int) -> Optional[Dict[str, Any]]:
+    return _user_db().get_dashboard_snapshot(user_id)
+
+
+# Report files are re-offered for download on every rerun; read each version
+# (path, mtime) once and serve the bytes from memory afterwards
+@st.cache_data(max_entries=50)
+def _read_bytes(path: str, mtime: float) -> bytes:
+    return Path(path).read_bytes()
+
+
+@st.cache_data(max_entries=50)
+def _read_text(path: str, mtime: float) -> str:
+    return Path(path).read_text(encoding='utf-8')
+
+
+# The history page checks three export files per entry; list each report
+# directory once instead of stat()ing every candidate
+def _list_dir(path: str) -> frozenset:
+    try:
+        with os.scandir(path) as entries:
+            return frozenset(entry.name for entry in entries)
+    except OSError:
+        return frozenset()
+
+
+# Directory listings are I/O-bound (slow on network filesystems), so several
+# report folders are listed concurrently
+@st.cache_data(ttl=15)
+def _dir_listings(paths: Tuple[str, ...]) -> Dict[str, frozenset]:
+    if len(paths) <= 1:
+        return {path: _list_dir(path) for path in paths}
+    with ThreadPoolExecutor(max_workers=min(16, len(paths))) as executor:
+        return dict(zip(paths, executor.map(_list_dir, paths)))
+
+
+# Reports above this size are rendered one H2 section per element so Streamlit
+# can diff sections instead of re-sending one huge markdown block
+MARKDOWN_CHUNK_CHARS = 50_000
+_H2_SPLIT = re.compile(r'\n(?=## )')
+
+
+@st.cache_data(max_entries=16)
+def _markdown_sections(path: str, mtime: float) -> List[str]:
+    text = _read_text(path, mtime)
+    if len(text) <= MARKDOWN_CHUNK_CHARS:
+        return [text]
+    return _H2_SPLIT.split(text)
+
+
+def _file_bytes(path) -> bytes:
+    """Cached contents of a binary file."""
+    return _read_bytes(str(path), os.path.getmtime(path))
+
+
+def _file_text(path) -> str:
+    """Cached contents of a UTF-8 text file."""
+    return _read_text(str(path), os.path.getmtime(path))
 
 
 class AutoResearchApp:
@@ -98,24 +250,29 @@ class AutoResearchApp:
             st.session_state.tier = None
         
         # Initialize services
-        self.db = UserDatabase()
-        self.usage_tracker = UsageTracker()
-        self.jwt_manager = JWTManager()
-        self.password_recovery = PasswordRecovery(self.db)
+        self.db = _user_db()
+        self.usage_tracker = _usage_tracker()
+        self.jwt_manager = _jwt_manager()
+        self.password_recovery = _password_recovery()
         
         # Initialize research components
-        self.mode_manager = ResearchModeManager()
-        self.query_processor = QueryProcessor()
-        self.search_engine = MultiSourceSearchEngine()
+        self.mode_manager = _mode_manager()
+        self.mode_configs = _mode_configs()
+        self.query_processor = _query_processor()
+        self.search_engine = _search_engine()
         
-        # Initialize utilities
+        # Initialize utilities (module-level singletons, already shared)
         self.cache = get_cache(similarity_enabled=True)
         self.exporter = get_exporter()
         self.chart_generator = get_chart_generator()
         self.credibility_scorer = get_credibility_scorer()
         
         # Initialize model router
-        self.model_router = ModelRouter()
+        self.model_router = _model_router()
+    
+    def _run(self, coro):
+        """Run a coroutine on the shared background loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
     
     def show_login_page(self):
         """Show login/signup page."""
@@ -152,6 +309,7 @@ class AutoResearchApp:
                         st.session_state.user_id = user['id']
                         st.session_state.username = user['username']
                         st.session_state.tier = user.get('tier', 'free')
+                        _dashboard_snapshot.clear()
                         st.success(f"Welcome back, {user['username']}!")
                         st.rerun()
                     except AuthenticationError as e:
@@ -170,7 +328,10 @@ class AutoResearchApp:
             submit = st.form_submit_button("Create Account", use_container_width=True)
             
             if submit:
-                if not all([name, email, username, password, confirm_password]):
+                # Identity fields are stripped once; passwords are taken verbatim
+                name, email, username = name.strip(), email.strip(), username.strip()
+                
+                if not (name and email and username and password and confirm_password):
                     st.error("Please fill in all fields")
                 elif password != confirm_password:
                     st.error("Passwords do not match")
@@ -179,12 +340,17 @@ class AutoResearchApp:
                 else:
                     try:
                         user_id = self.db.create_user(name, email, username, password)
+                        _dashboard_snapshot.clear()
                         st.success("Account created successfully! Please login.")
                     except Exception as e:
                         st.error(f"Failed to create account: {str(e)}")
     
     def show_dashboard(self):
         """Show main dashboard."""
+        # Profile + today's usage in one query, shared by every page this rerun
+        snapshot = _dashboard_snapshot(st.session_state.user_id) or {}
+        st.session_state["dashboard_snapshot"] = snapshot
+        
         # Sidebar
         with st.sidebar:
             st.title("🔬 Research Agent")
@@ -192,14 +358,7 @@ class AutoResearchApp:
             st.markdown(f"**Tier:** {st.session_state.tier.upper()}")
             st.markdown("---")
             
-            # Usage stats
-            usage_count = self.usage_tracker.get_usage_today(st.session_state.user_id)
-            limit = "Unlimited" if st.session_state.tier == "premium" else "5"
-            st.metric("Daily Usage", f"{usage_count} / {limit}")
-            
-            # Cache stats
-            cache_stats = self.cache.get_stats()
-            st.metric("Cache Entries", cache_stats['total_entries'])
+            self._show_sidebar_metrics()
             
             st.markdown("---")
             
@@ -228,6 +387,20 @@ class AutoResearchApp:
         elif page == "⚙️ Settings":
             self._show_settings_page()
     
+    @st.fragment(run_every=30)
+    def _show_sidebar_metrics(self):
+        """Show usage and cache metrics, refreshed on their own timer."""
+        # Usage stats
+        snapshot = _dashboard_snapshot(st.session_state.user_id) or {}
+        usage_count = snapshot.get("usage_today", 0)
+        limit = "Unlimited" if st.session_state.tier == "premium" else "5"
+        st.metric("Daily Usage", f"{usage_count} / {limit}")
+        
+        # Cache stats
+        cache_stats = _cache_stats()
+        st.metric("Cache Entries", cache_stats['total_entries'])
+    
+    @st.fragment
     def _show_research_page(self):
         """Show research interface."""
         st.title("🔬 New Research")
@@ -259,9 +432,7 @@ class AutoResearchApp:
         # Display selected mode
         if 'selected_mode' in st.session_state:
             mode = st.session_state.selected_mode
-            from research.research_modes import ResearchMode
-            mode_enum = ResearchMode(mode)
-            mode_config = self.mode_manager.get_config(mode_enum)
+            mode_config = self.mode_configs[mode]
             
             st.info(f"**Selected Mode:** {mode.capitalize()} - {mode_config.max_sources} sources, ~{mode_config.max_words} words")
         
@@ -282,119 +453,142 @@ class AutoResearchApp:
         """Execute research workflow."""
         with st.spinner("🔍 Researching..."):
             try:
-                # Process query
-                st.info(f"📝 Processing query: {query}")
-                
-                # Since process is async but we're in sync context, use a simple sync wrapper
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                
-                processed_query = loop.run_until_complete(self.query_processor.process(query))
-                
-                # Convert ProcessedQuery to dict for compatibility
-                processed_dict = {
-                    "original_query": processed_query.original,
-                    "corrected_query": processed_query.corrected,
-                    "keywords": processed_query.keywords,
-                    "expanded_queries": processed_query.expanded_queries,
-                    "question_type": processed_query.question_type
-                }
-                
-                # Check cache
-                st.info("💾 Checking cache...")
-                cached = self.cache.get(query, st.session_state.tier, mode)
-                if cached:
-                    st.success("✅ Found in cache!")
-                    self._display_results(cached)
-                    return
-                
-                # Get mode settings
-                mode_enum = ResearchMode(mode)
-                mode_config = self.mode_manager.get_config(mode_enum)
-                
-                # Check premium requirement
-                if mode_config.premium_only and st.session_state.tier != "premium":
-                    st.error("🔒 This mode requires Premium subscription")
-                    return
-                
-                # Search
-                st.info(f"🔎 Searching {mode_config.max_sources} sources...")
-                search_results = loop.run_until_complete(
-                    self.search_engine.search(
-                        processed_dict["corrected_query"],
-                        max_results=mode_config.max_sources
-                    )
-                )
-                
-                # Convert SearchResult objects to dicts
-                search_results = [r.to_dict() if hasattr(r, 'to_dict') else r for r in search_results]
-                
-                # Score credibility
-                st.info("🎯 Scoring source credibility...")
-                scored_sources = self.credibility_scorer.score_sources(search_results)
-                
-                # Run workflow
-                st.info("🤖 Running research workflow...")
-                from subscription.manager import SubscriptionTier
-                tier_enum = SubscriptionTier.PREMIUM if st.session_state.tier == "premium" else SubscriptionTier.FREE
-                workflow = TieredResearchOrchestrator(
-                    user_id=str(st.session_state.user_id),
-                    tier=tier_enum
-                )
-                
-                loop = asyncio.get_event_loop()
-                result = loop.run_until_complete(workflow.research(
-                    query=processed_dict["corrected_query"],
-                    output_format="all"  # Generate all available formats
-                ))
-                
-                # Add metadata
-                result["query_processing"] = processed_dict
-                result["mode"] = mode
-                result["sources"] = scored_sources
-                result["timestamp"] = datetime.now().isoformat()
-                
-                # Generate charts for deep mode
-                if mode == "deep":
-                    st.info("📊 Generating charts...")
-                    charts = self.chart_generator.generate_all_charts(result)
-                    result["charts"] = charts
-                
-                # Get statistics from workflow
-                stats = result.get("statistics", {})
-                
-                # Cache result
-                self.cache.set(query, st.session_state.tier, mode, result)
-                
-                # Record usage - increment daily counter
-                self.usage_tracker.increment_usage(st.session_state.user_id)
-                
-                # Add to research history
-                output_files = result.get("output_files", {})
-                report_path = output_files.get("markdown", "")
-                
-                self.usage_tracker.add_research_history(
-                    st.session_state.user_id,
-                    query,
-                    st.session_state.tier,
-                    stats.get("word_count", 0),
-                    stats.get("sources_count", 0),
-                    report_path
-                )
-                
-                st.success("✅ Research completed!")
-                self._display_results(result)
+                self._research(query, mode)
                 
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
                 logger.error(f"Research failed: {e}", exc_info=True)
     
+    def _research(self, query: str, mode: str):
+        """Research pipeline; async stages run on the shared background loop."""
+        tier = st.session_state.tier
+        user_id = st.session_state.user_id
+        
+        # Process query and check cache concurrently
+        st.info(f"📝 Processing query: {query}")
+        st.info("💾 Checking cache...")
+        processed_query, cached = self._run(self._aprocess_query(query, tier, mode))
+        
+        if cached:
+            st.success("✅ Found in cache!")
+            self._display_results(cached)
+            return
+        
+        # Convert ProcessedQuery to dict for compatibility
+        processed_dict = {
+            "original_query": processed_query.original,
+            "corrected_query": processed_query.corrected,
+            "keywords": processed_query.keywords,
+            "expanded_queries": processed_query.expanded_queries,
+            "question_type": processed_query.question_type
+        }
+        
+        # Get mode settings
+        mode_config = self.mode_configs[mode]
+        
+        # Check premium requirement
+        if mode_config.premium_only and tier != "premium":
+            st.error("🔒 This mode requires Premium subscription")
+            return
+        
+        # Search while the orchestrator is built off the event loop
+        st.info(f"🔎 Searching {mode_config.max_sources} sources...")
+        search_results, workflow = self._run(self._asearch(
+            processed_dict["corrected_query"], mode_config.max_sources, user_id, tier
+        ))
+        
+        # Run workflow; credibility scoring overlaps with it
+        st.info("🎯 Scoring source credibility...")
+        st.info("🤖 Running research workflow...")
+        result, scored_sources = self._run(self._aworkflow(
+            workflow, processed_dict["corrected_query"], search_results
+        ))
+        
+        # Add metadata
+        result["query_processing"] = processed_dict
+        result["mode"] = mode
+        result["sources"] = scored_sources
+        result["timestamp"] = datetime.now().isoformat()
+        
+        # Generate charts for deep mode while usage and history are recorded
+        charts_future = None
+        if mode == "deep":
+            st.info("📊 Generating charts...")
+            charts_future = asyncio.run_coroutine_threadsafe(
+                asyncio.to_thread(self.chart_generator.generate_all_charts, result),
+                _event_loop()
+            )
+        
+        # Get statistics from workflow
+        stats = result.get("statistics", {})
+        
+        # Record usage - increment daily counter
+        self.usage_tracker.increment_usage(user_id)
+        _dashboard_snapshot.clear()
+        _dir_listings.clear()
+        
+        # Add to research history
+        output_files = result.get("output_files", {})
+        report_path = output_files.get("markdown", "")
+        
+        self.usage_tracker.add_research_history(
+            user_id,
+            query,
+            tier,
+            stats.get("word_count", 0),
+            stats.get("sources_count", 0),
+            report_path
+        )
+        
+        if charts_future is not None:
+            result["charts"] = charts_future.result()
+        
+        # Cache result
+        self.cache.set(query, tier, mode, result)
+        _cache_stats.clear()
+        
+        st.success("✅ Research completed!")
+        self._display_results(result)
+    
+    async def _aprocess_query(self, query: str, tier: str, mode: str):
+        """Process the query and look it up in the cache concurrently."""
+        return await asyncio.gather(
+            self.query_processor.process(query),
+            asyncio.to_thread(self.cache.get, query, tier, mode)
+        )
+    
+    async def _asearch(self, query: str, max_sources: int, user_id: int, tier: str):
+        """Search sources while the orchestrator is constructed in a worker thread."""
+        search_results, workflow = await asyncio.gather(
+            self.search_engine.search(query, max_results=max_sources),
+            asyncio.to_thread(
+                TieredResearchOrchestrator,
+                user_id=str(user_id),
+                tier=TIER_ENUMS.get(tier, SubscriptionTier.FREE),
+                model_router=self.model_router
+            )
+        )
+        
+        # Convert SearchResult objects to dicts
+        search_results = [r.to_dict() if hasattr(r, 'to_dict') else r for r in search_results]
+        return search_results, workflow
+    
+    async def _aworkflow(self, workflow: TieredResearchOrchestrator, query: str, search_results):
+        """Run the research workflow, scoring credibility in a worker thread meanwhile."""
+        score_task = asyncio.create_task(
+            asyncio.to_thread(self.credibility_scorer.score_sources, search_results)
+        )
+        result = await workflow.research(
+            query=query,
+            output_format="all"  # Generate all available formats
+        )
+        return result, await score_task
+    
+    @st.fragment
     def _display_results(self, result: Dict[str, Any]):
         """Display research results."""
+        output_paths = {fmt: Path(path) for fmt, path in result.get("output_files", {}).items() if path}
+        
         st.markdown("---")
         st.subheader("📄 Research Report")
         
@@ -403,13 +597,13 @@ class AutoResearchApp:
         
         with tab1:
             # Read report from generated file
-            output_files = result.get("output_files", {})
-            markdown_file = output_files.get("markdown", "")
+            markdown_file = output_paths.get("markdown")
             
-            if markdown_file and Path(markdown_file).exists():
-                with open(markdown_file, 'r', encoding='utf-8') as f:
-                    final_report = f.read()
-                st.markdown(final_report)
+            if markdown_file and markdown_file.exists():
+                sections = _markdown_sections(str(markdown_file), os.path.getmtime(markdown_file))
+                with st.container():
+                    for section in sections:
+                        st.markdown(section)
             else:
                 st.warning("Report file not found. Check output_files directory.")
                 st.json(result)
@@ -452,41 +646,37 @@ class AutoResearchApp:
             # Export options - files already generated by workflow
             st.subheader("📥 Generated Files")
             
-            output_files = result.get("output_files", {})
-            
-            if output_files:
-                for format_name, file_path in output_files.items():
-                    if Path(file_path).exists():
+            if output_paths:
+                for format_name, file_path in output_paths.items():
+                    if file_path.exists():
                         st.success(f"✅ {format_name.upper()}: `{file_path}`")
                         
                         # Offer download for all formats
                         if format_name == "markdown":
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                st.download_button(
-                                    label=f"⬇️ Download {format_name.upper()}",
-                                    data=f.read(),
-                                    file_name=Path(file_path).name,
-                                    mime="text/markdown"
-                                )
+                            st.download_button(
+                                label=f"⬇️ Download {format_name.upper()}",
+                                data=_file_text(file_path),
+                                file_name=file_path.name,
+                                mime="text/markdown"
+                            )
                         elif format_name == "pdf":
-                            with open(file_path, 'rb') as f:
-                                st.download_button(
-                                    label=f"⬇️ Download {format_name.upper()}",
-                                    data=f.read(),
-                                    file_name=Path(file_path).name,
-                                    mime="application/pdf"
-                                )
+                            st.download_button(
+                                label=f"⬇️ Download {format_name.upper()}",
+                                data=_file_bytes(file_path),
+                                file_name=file_path.name,
+                                mime="application/pdf"
+                            )
                         elif format_name == "docx":
-                            with open(file_path, 'rb') as f:
-                                st.download_button(
-                                    label=f"⬇️ Download {format_name.upper()}",
-                                    data=f.read(),
-                                    file_name=Path(file_path).name,
-                                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                                )
+                            st.download_button(
+                                label=f"⬇️ Download {format_name.upper()}",
+                                data=_file_bytes(file_path),
+                                file_name=file_path.name,
+                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                            )
             else:
                 st.info("No export files generated yet.")
     
+    @st.fragment
     def _show_history_page(self):
         """Show research history."""
         st.title("📚 Research History")
@@ -497,10 +687,14 @@ class AutoResearchApp:
             st.info("No research history yet. Start your first research!")
             return
         
-        for idx, item in enumerate(history):
+        # (base_path, base_name) per row, and one directory listing per distinct report folder
+        reports = [Path(item['report_path']) if item.get('report_path') else None for item in history]
+        dirs = {str(report.parent) for report in reports if report}
+        listings = _dir_listings(tuple(sorted(dirs)))
+        
+        for idx, (item, report) in enumerate(zip(history, reports)):
             query = item.get('query', 'Unknown')
             timestamp = item.get('created_at', '')
-            report_path = item.get('report_path', '')
             
             with st.expander(f"{query} - {timestamp}"):
                 col1, col2 = st.columns([3, 1])
@@ -511,60 +705,57 @@ class AutoResearchApp:
                     st.write(f"**Word Count:** {item.get('word_count', 'N/A')}")
                 
                 with col2:
-                    from pathlib import Path
+                    base_path, base_name = (report.parent, report.stem) if report else (None, None)
+                    names = listings[str(base_path)] if report else frozenset()
                     
                     # Use the stored report path to find all related files
-                    if report_path and Path(report_path).exists():
-                        base_path = Path(report_path).parent
-                        base_name = Path(report_path).stem
+                    if report and report.name in names:
                         
                         # Look for markdown file
                         md_file = base_path / f"{base_name}.md"
-                        if md_file.exists():
-                            with open(md_file, 'r', encoding='utf-8') as f:
-                                st.download_button(
-                                    label="📄 MD",
-                                    data=f.read(),
-                                    file_name=md_file.name,
-                                    mime="text/markdown",
-                                    key=f"md_{idx}_{md_file.name}",
-                                    use_container_width=True
-                                )
+                        if md_file.name in names:
+                            st.download_button(
+                                label="📄 MD",
+                                data=_file_text(md_file),
+                                file_name=md_file.name,
+                                mime="text/markdown",
+                                key=f"md_{idx}_{md_file.name}",
+                                use_container_width=True
+                            )
                         
                         # Look for PDF file
                         pdf_file = base_path / f"{base_name}.pdf"
-                        if pdf_file.exists():
-                            with open(pdf_file, 'rb') as f:
-                                st.download_button(
-                                    label="📕 PDF",
-                                    data=f.read(),
-                                    file_name=pdf_file.name,
-                                    mime="application/pdf",
-                                    key=f"pdf_{idx}_{pdf_file.name}",
-                                    use_container_width=True
-                                )
+                        if pdf_file.name in names:
+                            st.download_button(
+                                label="📕 PDF",
+                                data=_file_bytes(pdf_file),
+                                file_name=pdf_file.name,
+                                mime="application/pdf",
+                                key=f"pdf_{idx}_{pdf_file.name}",
+                                use_container_width=True
+                            )
                         
                         # Look for DOCX file
                         docx_file = base_path / f"{base_name}.docx"
-                        if docx_file.exists():
-                            with open(docx_file, 'rb') as f:
-                                st.download_button(
-                                    label="📘 DOCX",
-                                    data=f.read(),
-                                    file_name=docx_file.name,
-                                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                    key=f"docx_{idx}_{docx_file.name}",
-                                    use_container_width=True
-                                )
+                        if docx_file.name in names:
+                            st.download_button(
+                                label="📘 DOCX",
+                                data=_file_bytes(docx_file),
+                                file_name=docx_file.name,
+                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                                key=f"docx_{idx}_{docx_file.name}",
+                                use_container_width=True
+                            )
                     else:
                         st.caption("Files not available")
     
+    @st.fragment
     def _show_statistics_page(self):
         """Show usage statistics."""
         st.title("📊 Usage Statistics")
         
         # Daily usage
-        usage_count = self.usage_tracker.get_usage_today(st.session_state.user_id)
+        usage_count = st.session_state["dashboard_snapshot"].get("usage_today", 0)
         limit = "Unlimited" if st.session_state.tier == "premium" else "5"
         
         col1, col2 = st.columns(2)
@@ -577,7 +768,7 @@ class AutoResearchApp:
         
         # Cache stats
         st.subheader("💾 Cache Statistics")
-        cache_stats = self.cache.get_stats()
+        cache_stats = _cache_stats()
         
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -589,15 +780,17 @@ class AutoResearchApp:
         
         if st.button("🗑️ Clear Cache"):
             self.cache.base_cache.clear_all()
+            _cache_stats.clear()
             st.success("Cache cleared!")
             st.rerun()
     
+    @st.fragment
     def _show_settings_page(self):
         """Show settings."""
         st.title("⚙️ Settings")
         
         # Account info
-        user = self.db.get_user(st.session_state.user_id)
+        user = st.session_state["dashboard_snapshot"]
         
         st.subheader("Account Information")
         st.write(f"**Username:** {user.get('username', 'N/A')}")
@@ -692,6 +885,8 @@ class AutoResearchApp:
 
 def main():
     """Main entry point."""
+    config.ensure_dirs()
+    _inject_css()
     app = AutoResearchApp()
     
     if not st.session_state.authenticated:
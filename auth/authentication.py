@@ -4,48 +4,447 @@ Handles signup, login, password hashing, JWT tokens, and user management.
 """
 
 import sqlite3
-import hashlib
+import hmac
+import json
 import secrets
 import re
 import os
+import math
+import time
+import atexit
 import tempfile
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Dict, Any, Tuple
 import bcrypt
 import jwt
+from jwt.algorithms import HMACAlgorithm
+from jwt.utils import base64url_encode
 import logging
 
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
+import config
+from auth.connection_pool import ConnectionPool, get_connection_pool
+
 logger = logging.getLogger(__name__)
 
+# Upper bound for the calibrated bcrypt cost
+MAX_BCRYPT_COST = 16
+
+# Caps login/signup bursts at KDF_WORKERS concurrent hashes. Callers still
+# block until their hash is done; this bounds CPU and memory, it doesn't
+# move the wait off the calling thread
+_kdf_pool = ThreadPoolExecutor(max_workers=config.KDF_WORKERS, thread_name_prefix="kdf")
+
+
+@lru_cache(maxsize=1)
+def bcrypt_rounds() -> int:
+    """
+    Calibrate the bcrypt cost once per process.
+    
+    Times one hash at the configured minimum cost and raises the cost while
+    the estimate (each step doubles the work) stays within the time budget.
+    
+    Returns:
+        Cost to pass to bcrypt.gensalt()
+    """
+    cost = config.BCRYPT_COST
+    budget = config.BCRYPT_TIME_BUDGET_MS / 1000
+    if budget <= 0:
+        return cost
+    
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=cost))
+    elapsed = time.perf_counter() - start
+    
+    if elapsed < budget:
+        cost += int(math.log2(budget / elapsed))
+    cost = min(cost, MAX_BCRYPT_COST)
+    
+    logger.info(f"bcrypt cost calibrated to {cost} ({elapsed * 1000:.0f} ms at {config.BCRYPT_COST})")
+    return cost
+
+
+# Argon2id with argon2-cffi's defaults; bcrypt is only used without it
+_argon2 = PasswordHasher() if ARGON2_AVAILABLE else None
+
+
+def _bcrypt_hash(password: bytes) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=bcrypt_rounds()))
+
+
+def _argon2_hash(password: bytes) -> bytes:
+    return _argon2.hash(password).encode()
+
+
+def _verify(password: bytes, password_hash: bytes) -> bool:
+    if password_hash.startswith(b"$argon2"):
+        if not ARGON2_AVAILABLE:
+            logger.error("Argon2 password hash found but argon2-cffi is not installed")
+            return False
+        try:
+            return _argon2.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):  # mismatch or malformed hash
+            return False
+    
+    # Legacy bcrypt ($2a$/$2b$/$2y$)
+    return bcrypt.checkpw(password, password_hash)
+
+
+def hash_password(password: bytes) -> bytes:
+    """
+    Hash a password (Argon2id, or bcrypt without argon2-cffi) on the KDF thread pool.
+    
+    Blocks the caller until the hash is done; the pool only bounds how many
+    hashes run at once.
+    
+    Returns:
+        Encoded hash, stored as-is in the BLOB password_hash column
+    """
+    if ARGON2_AVAILABLE:
+        return _kdf_pool.submit(_argon2_hash, password).result()
+    return _kdf_pool.submit(_bcrypt_hash, password).result()
+
+
+def check_password(password: bytes, password_hash: bytes) -> bool:
+    """
+    Verify a password against an Argon2 or bcrypt hash on the KDF thread pool.
+    
+    Blocks the caller like hash_password(); the pool only bounds concurrency.
+    """
+    return _kdf_pool.submit(_verify, password, password_hash).result()
+
+
+def password_needs_rehash(password_hash: bytes) -> bool:
+    """Whether a verified hash should be replaced (bcrypt or outdated Argon2 parameters)."""
+    if not ARGON2_AVAILABLE:
+        return False
+    if not password_hash.startswith(b"$argon2"):
+        return True
+    return _argon2.check_needs_rehash(password_hash.decode())
+
 
 class AuthenticationError(Exception):
     """Custom exception for authentication errors."""
     pass
 
 
+# Profile lookups served from memory for this long after a read
+USER_CACHE_TTL = 60
+# Session tokens expire after a week
+TOKEN_LIFETIME_SECONDS = 7 * 86400
+# Decoded JWTs are trusted for at most this long (and never past their exp)
+TOKEN_CACHE_TTL = 300
+# Today's search counts are re-read from the database after this long
+USAGE_CACHE_TTL = 60
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL."""
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        """
+        Initialize cache.
+        
+        Args:
+            maxsize: Entries kept before the least recently used is evicted
+            ttl: Default lifetime of an entry in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Any) -> Optional[Any]:
+        """Get a live entry, or None."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if time.monotonic() >= expires:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        """Store an entry for ttl seconds (default: the cache TTL)."""
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Any):
+        """Drop an entry if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+
+def _resolve_db_path(db_path: str) -> str:
+    """Map a relative database path to a writable location."""
+    # For Streamlit Cloud, ensure we use a writable directory
+    if not os.path.isabs(db_path):
+        # Use current directory or temp directory for relative paths
+        if os.path.exists('.streamlit'):
+            # Running on Streamlit Cloud
+            db_path = os.path.join(tempfile.gettempdir(), os.path.basename(db_path))
+        else:
+            # Local development
+            db_dir = os.path.dirname(db_path) if os.path.dirname(db_path) else '.'
+            os.makedirs(db_dir, exist_ok=True)
+    
+    return db_path
+
+
+# Statements used on pooled connections. Each connection keeps its own
+# compiled-statement cache (cached_statements), so these are parsed once per
+# connection rather than once per call
+SQL_UPSERT_USAGE_BATCH = '''
+    INSERT INTO usage_tracking (user_id, date, searches_count)
+    VALUES (?, ?, ?)
+    ON CONFLICT(user_id, date)
+    DO UPDATE SET searches_count = searches_count + excluded.searches_count
+'''
+SQL_INSERT_USER = '''
+    INSERT INTO users (name, email, username, password_hash)
+    VALUES (?, ?, ?, ?)
+'''
+# One indexed lookup per branch (username match preferred) rather than an OR
+SQL_SELECT_USER_FOR_LOGIN = '''
+    SELECT id, name, email, username, password_hash, tier,
+           failed_login_attempts, account_locked_until
+    FROM users
+    WHERE lower(username) = lower(?)
+    UNION ALL
+    SELECT id, name, email, username, password_hash, tier,
+           failed_login_attempts, account_locked_until
+    FROM users
+    WHERE lower(email) = lower(?)
+    LIMIT 1
+'''
+SQL_RECORD_LOGIN = '''
+    UPDATE users
+    SET failed_login_attempts = 0,
+        account_locked_until = NULL,
+        last_login = ?,
+        password_hash = ?
+    WHERE id = ?
+'''
+# Count a failure and lock the account once it reaches the limit, atomically
+SQL_RECORD_FAILED_LOGIN = '''
+    UPDATE users
+    SET failed_login_attempts = failed_login_attempts + 1,
+        account_locked_until = CASE
+            WHEN failed_login_attempts + 1 >= ? THEN ?
+            ELSE account_locked_until
+        END
+    WHERE id = ?
+    RETURNING failed_login_attempts
+'''
+SQL_SET_PASSWORD = '''
+    UPDATE users
+    SET password_hash = ?,
+        failed_login_attempts = 0,
+        account_locked_until = NULL
+    WHERE id = ?
+'''
+SQL_SELECT_USER = '''
+    SELECT id, name, email, username, tier, created_at, last_login
+    FROM users
+    WHERE id = ?
+'''
+SQL_SELECT_DASHBOARD = '''
+    SELECT u.id, u.name, u.email, u.username, u.tier, u.created_at,
+           u.last_login, COALESCE(t.searches_count, 0) AS usage_today
+    FROM users u
+    LEFT JOIN usage_tracking t
+           ON t.user_id = u.id AND t.date = ?
+    WHERE u.id = ?
+'''
+SQL_SET_TIER = '''
+    UPDATE users
+    SET tier = ?
+    WHERE id = ?
+'''
+SQL_SELECT_USAGE_TODAY = '''
+    SELECT searches_count
+    FROM usage_tracking
+    WHERE user_id = ? AND date = ?
+'''
+SQL_INSERT_HISTORY = '''
+    INSERT INTO research_history
+    (user_id, query, tier, word_count, sources_count, report_path)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+SQL_SELECT_HISTORY = '''
+    SELECT query, tier, word_count, sources_count, created_at, report_path
+    FROM research_history
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+    LIMIT ?
+'''
+
+
+# Failed logins allowed before an account is locked, and for how long (seconds)
+MAX_FAILED_LOGINS = 5
+ACCOUNT_LOCK_SECONDS = 30 * 60
+
+
+def _today() -> str:
+    """Usage-tracking day key: the local date as YYYY-MM-DD, as stored in existing rows."""
+    return time.strftime("%Y-%m-%d")
+
+
+# Pending usage increments are written to the database this often (seconds)
+USAGE_FLUSH_INTERVAL = 0.25
+
+
+class UsageFlusher:
+    """
+    Coalesces usage increments in memory and writes them in batches.
+    
+    A background thread drains the pending counts every USAGE_FLUSH_INTERVAL
+    seconds into one executemany UPSERT and a single commit, so N searches
+    cost one transaction instead of N. Pending counts are flushed at exit.
+    
+    `lock` is held across a whole flush, so a caller holding it sees every
+    increment either pending or written, never in between.
+    """
+    
+    def __init__(self, pool: ConnectionPool, interval: float = USAGE_FLUSH_INTERVAL):
+        """
+        Start the flusher thread.
+        
+        Args:
+            pool: Connection pool of the usage database
+            interval: Seconds between flushes
+        """
+        self.pool = pool
+        self.interval = interval
+        self._pending: Counter = Counter()
+        self.lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="usage-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def add(self, user_id: int, date, count: int = 1):
+        """Queue an increment of a user's count for a date."""
+        with self.lock:
+            self._pending[(user_id, date)] += count
+    
+    def pending(self, user_id: int, date) -> int:
+        """Increments queued for a user and date but not yet written."""
+        with self.lock:
+            return self._pending.get((user_id, date), 0)
+    
+    def flush(self):
+        """Write all pending increments in one transaction."""
+        with self.lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, Counter()
+            
+            try:
+                with self.pool.acquire(write=True) as conn:
+                    conn.executemany(
+                        SQL_UPSERT_USAGE_BATCH,
+                        [(user_id, date, count) for (user_id, date), count in batch.items()]
+                    )
+                    conn.commit()
+            except sqlite3.Error as e:
+                # Keep the counts for the next attempt
+                logger.error(f"Usage flush failed: {e}")
+                self._pending.update(batch)
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+    
+    def close(self):
+        """Stop the background thread and write what is left."""
+        self._stop.set()
+        self.flush()
+
+
+# One flusher per connection pool (i.e. per database file)
+_usage_flushers: Dict[int, UsageFlusher] = {}
+_usage_flushers_lock = threading.Lock()
+
+
+def get_usage_flusher(pool: ConnectionPool) -> UsageFlusher:
+    """Get the shared usage flusher for a connection pool."""
+    with _usage_flushers_lock:
+        flusher = _usage_flushers.get(id(pool))
+        if flusher is None:
+            flusher = _usage_flushers[id(pool)] = UsageFlusher(pool)
+        return flusher
+
+
 class UserDatabase:
     """SQLite database for user management."""
     
     def __init__(self, db_path: str = "data/users.db"):
-        # For Streamlit Cloud, ensure we use a writable directory
-        if not os.path.isabs(db_path):
-            # Use current directory or temp directory for relative paths
-            if os.path.exists('.streamlit'):
-                # Running on Streamlit Cloud
-                db_path = os.path.join(tempfile.gettempdir(), os.path.basename(db_path))
-            else:
-                # Local development
-                db_dir = os.path.dirname(db_path) if os.path.dirname(db_path) else '.'
-                os.makedirs(db_dir, exist_ok=True)
-        
-        self.db_path = db_path
+        self.db_path = _resolve_db_path(db_path)
+        self.pool = get_connection_pool(self.db_path)
+        self._user_cache = TTLCache(maxsize=1024, ttl=USER_CACHE_TTL)
         self._init_database()
+        
+        # Calibrate now rather than on the first signup (bcrypt is only
+        # used to hash new passwords when argon2-cffi is missing)
+        if not ARGON2_AVAILABLE:
+            bcrypt_rounds()
     
     def _init_database(self):
         """Initialize database schema."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.pool.acquire(write=True) as conn:
+            self._create_schema(conn.cursor())
+            conn.commit()
+            self._create_indexes(conn)
+        logger.info("Database initialized")
+    
+    @staticmethod
+    def _create_indexes(conn: sqlite3.Connection):
+        """Create lookup indexes for login, history and case-insensitive uniqueness."""
+        # Newest-first history per user; usage_tracking is already covered by
+        # its UNIQUE(user_id, date) index
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_history_user_created
+            ON research_history(user_id, created_at DESC)
+        ''')
         
+        # Case-insensitive login lookups and uniqueness
+        for column in ("email", "username"):
+            try:
+                conn.execute(f'''
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_users_{column}_lower
+                    ON users(lower({column}))
+                ''')
+            except sqlite3.IntegrityError:
+                # Existing rows differ only by case; index without uniqueness
+                logger.warning(f"Duplicate {column}s ignoring case; lower({column}) index is not unique")
+                conn.execute(f'''
+                    CREATE INDEX IF NOT EXISTS idx_users_{column}_lower_nonunique
+                    ON users(lower({column}))
+                ''')
+        
+        conn.commit()
+    
+    @staticmethod
+    def _create_schema(cursor: sqlite3.Cursor):
+        """Create the users, usage and history tables."""
         # Users table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -53,7 +452,7 @@ class UserDatabase:
                 name TEXT NOT NULL,
                 email TEXT UNIQUE NOT NULL,
                 username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
+                password_hash BLOB NOT NULL,
                 tier TEXT DEFAULT 'free',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 last_login TIMESTAMP,
@@ -89,10 +488,6 @@ class UserDatabase:
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
         ''')
-        
-        conn.commit()
-        conn.close()
-        logger.info("Database initialized")
     
     def create_user(
         self,
@@ -102,213 +497,194 @@ class UserDatabase:
         password: str
     ) -> int:
         """Create a new user."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Hash password (outside the write lock)
+        password_hash = hash_password(password.encode())
         
-        try:
-            # Hash password with bcrypt
-            password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        with self.pool.acquire(write=True) as conn:
+            cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT INTO users (name, email, username, password_hash)
-                VALUES (?, ?, ?, ?)
-            ''', (name, email, username, password_hash))
-            
-            user_id = cursor.lastrowid
-            conn.commit()
-            
-            logger.info(f"User created: {username} (ID: {user_id})")
-            return user_id
-            
-        except sqlite3.IntegrityError as e:
-            logger.error(f"User creation failed: {e}")
-            if "email" in str(e):
-                raise AuthenticationError("Email already registered")
-            elif "username" in str(e):
-                raise AuthenticationError("Username already taken")
-            else:
-                raise AuthenticationError("User creation failed")
-        finally:
-            conn.close()
+            try:
+                cursor.execute(SQL_INSERT_USER, (name, email, username, password_hash))
+                
+                user_id = cursor.lastrowid
+                conn.commit()
+                
+                logger.info(f"User created: {username} (ID: {user_id})")
+                return user_id
+                
+            except sqlite3.IntegrityError as e:
+                logger.error(f"User creation failed: {e}")
+                if "email" in str(e):
+                    raise AuthenticationError("Email already registered")
+                elif "username" in str(e):
+                    raise AuthenticationError("Username already taken")
+                else:
+                    raise AuthenticationError("User creation failed")
     
     def verify_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """Verify user credentials."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                SELECT id, name, email, username, password_hash, tier, 
-                       failed_login_attempts, account_locked_until
-                FROM users 
-                WHERE username = ? OR email = ?
-            ''', (username, username))
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(SQL_SELECT_USER_FOR_LOGIN, (username, username))
             
             row = cursor.fetchone()
+        
+        if not row:
+            return None
+        
+        user_id, name, email, uname, password_hash, tier, _, locked_until = row
+        
+        # Check if account is locked (epoch seconds; older rows hold ISO text)
+        if locked_until:
+            if isinstance(locked_until, str):
+                locked_until = datetime.fromisoformat(locked_until).timestamp()
+            remaining = locked_until - time.time()
+            if remaining > 0:
+                raise AuthenticationError(f"Account locked. Try again in {int(remaining) // 60} minutes")
+        
+        # Rows written before hashes were stored as BLOBs hold TEXT; they are
+        # rewritten as bytes on the next successful login
+        if isinstance(password_hash, str):
+            password_hash = password_hash.encode()
+        
+        # Verify password (no connection held while the KDF runs)
+        password = password.encode()
+        if check_password(password, password_hash):
+            # Transparently move bcrypt hashes to Argon2id
+            if password_needs_rehash(password_hash):
+                password_hash = hash_password(password)
+                logger.info(f"Password hash upgraded for user {user_id}")
             
-            if not row:
+            # Reset failed attempts
+            with self.pool.acquire(write=True) as conn:
+                conn.execute(SQL_RECORD_LOGIN, (int(time.time()), password_hash, user_id))
+                conn.commit()
+            self._user_cache.pop(user_id)
+            
+            logger.info(f"User logged in: {uname}")
+            
+            return {
+                "id": user_id,
+                "name": name,
+                "email": email,
+                "username": uname,
+                "tier": tier
+            }
+        
+        # Increment failed attempts, locking the account for 30 minutes at the limit
+        locked_until = int(time.time()) + ACCOUNT_LOCK_SECONDS
+        with self.pool.acquire(write=True) as conn:
+            failed_attempts = conn.execute(
+                SQL_RECORD_FAILED_LOGIN, (MAX_FAILED_LOGINS, locked_until, user_id)
+            ).fetchone()[0]
+            conn.commit()
+        
+        if failed_attempts >= MAX_FAILED_LOGINS:
+            raise AuthenticationError("Account locked due to too many failed attempts")
+        
+        return None
+    
+    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get user by ID (cached for USER_CACHE_TTL seconds)."""
+        user = self._user_cache.get(user_id)
+        if user is None:
+            user = self._fetch_user(user_id)
+            if user is None:
                 return None
+            self._user_cache.set(user_id, user)
+        return dict(user)
+    
+    def _fetch_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Read a user row by ID."""
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
             
-            user_id, name, email, uname, password_hash, tier, failed_attempts, locked_until = row
+            cursor.execute(SQL_SELECT_USER, (user_id,))
             
-            # Check if account is locked
-            if locked_until:
-                lock_time = datetime.fromisoformat(locked_until)
-                if datetime.now() < lock_time:
-                    remaining = (lock_time - datetime.now()).seconds // 60
-                    raise AuthenticationError(f"Account locked. Try again in {remaining} minutes")
+            row = cursor.fetchone()
             
-            # Verify password
-            if bcrypt.checkpw(password.encode(), password_hash.encode()):
-                # Reset failed attempts
-                cursor.execute('''
-                    UPDATE users 
-                    SET failed_login_attempts = 0, 
-                        account_locked_until = NULL,
-                        last_login = ?
-                    WHERE id = ?
-                ''', (datetime.now(), user_id))
-                conn.commit()
-                
-                logger.info(f"User logged in: {uname}")
-                
-                return {
-                    "id": user_id,
-                    "name": name,
-                    "email": email,
-                    "username": uname,
-                    "tier": tier
-                }
-            else:
-                # Increment failed attempts
-                failed_attempts += 1
-                
-                if failed_attempts >= 5:
-                    # Lock account for 30 minutes
-                    locked_until = datetime.now() + timedelta(minutes=30)
-                    cursor.execute('''
-                        UPDATE users 
-                        SET failed_login_attempts = ?,
-                            account_locked_until = ?
-                        WHERE id = ?
-                    ''', (failed_attempts, locked_until, user_id))
-                    conn.commit()
-                    raise AuthenticationError("Account locked due to too many failed attempts")
-                else:
-                    cursor.execute('''
-                        UPDATE users 
-                        SET failed_login_attempts = ?
-                        WHERE id = ?
-                    ''', (failed_attempts, user_id))
-                    conn.commit()
-                    
-                return None
-                
-        finally:
-            conn.close()
+            return dict(row) if row else None
     
-    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
-        """Get user by ID."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_dashboard_snapshot(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the user's profile and today's usage in a single query.
         
-        try:
-            cursor.execute('''
-                SELECT id, name, email, username, tier, created_at, last_login
-                FROM users 
-                WHERE id = ?
-            ''', (user_id,))
+        Returns:
+            get_user() fields plus "usage_today", or None if the user doesn't exist
+        """
+        today = _today()
+        
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(SQL_SELECT_DASHBOARD, (today, user_id))
             
             row = cursor.fetchone()
             
-            if row:
-                return {
-                    "id": row[0],
-                    "name": row[1],
-                    "email": row[2],
-                    "username": row[3],
-                    "tier": row[4],
-                    "created_at": row[5],
-                    "last_login": row[6]
-                }
-            return None
+            if not row:
+                return None
             
-        finally:
-            conn.close()
+            snapshot = dict(row)
+            # Include increments the flusher hasn't written yet
+            snapshot["usage_today"] += get_usage_flusher(self.pool).pending(user_id, today)
+            return snapshot
     
     def upgrade_user(self, user_id: int, tier: str = "premium"):
         """Upgrade user to premium tier."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                UPDATE users 
-                SET tier = ?
-                WHERE id = ?
-            ''', (tier, user_id))
+        with self.pool.acquire(write=True) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(SQL_SET_TIER, (tier, user_id))
             conn.commit()
             logger.info(f"User {user_id} upgraded to {tier}")
-            
-        finally:
-            conn.close()
+        
+        self._user_cache.pop(user_id)
 
 
 class UsageTracker:
     """Track user research usage and enforce limits."""
     
     def __init__(self, db_path: str = "data/users.db"):
-        # For Streamlit Cloud, ensure we use a writable directory
-        if not os.path.isabs(db_path):
-            if os.path.exists('.streamlit'):
-                # Running on Streamlit Cloud
-                db_path = os.path.join(tempfile.gettempdir(), os.path.basename(db_path))
-            else:
-                # Local development
-                db_dir = os.path.dirname(db_path) if os.path.dirname(db_path) else '.'
-                os.makedirs(db_dir, exist_ok=True)
-        
-        self.db_path = db_path
+        self.db_path = _resolve_db_path(db_path)
+        # Shares the UserDatabase pool when both point at the same file
+        self.pool = get_connection_pool(self.db_path)
+        # (user_id, date) -> searches_count; a new day is a new key
+        self._usage_today = TTLCache(maxsize=1024, ttl=USAGE_CACHE_TTL)
+        self.flusher = get_usage_flusher(self.pool)
     
     def get_usage_today(self, user_id: int) -> int:
         """Get user's search count for today."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.flusher.lock:
+            return self._usage_on(user_id, _today())
+    
+    def _usage_on(self, user_id: int, today: str) -> int:
+        """Search count for a date; the caller holds self.flusher.lock."""
+        cached = self._usage_today.get((user_id, today))
+        if cached is not None:
+            return cached
         
-        try:
-            today = datetime.now().date()
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT searches_count 
-                FROM usage_tracking 
-                WHERE user_id = ? AND date = ?
-            ''', (user_id, today))
+            cursor.execute(SQL_SELECT_USAGE_TODAY, (user_id, today))
             
             row = cursor.fetchone()
-            return row[0] if row else 0
-            
-        finally:
-            conn.close()
+        
+        count = (row[0] if row else 0) + self.flusher.pending(user_id, today)
+        self._usage_today.set((user_id, today), count)
+        return count
     
     def increment_usage(self, user_id: int):
-        """Increment user's daily usage count."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Increment user's daily usage count (written by the background flusher)."""
+        today = _today()
         
-        try:
-            today = datetime.now().date()
-            
-            cursor.execute('''
-                INSERT INTO usage_tracking (user_id, date, searches_count)
-                VALUES (?, ?, 1)
-                ON CONFLICT(user_id, date) 
-                DO UPDATE SET searches_count = searches_count + 1
-            ''', (user_id, today))
-            
-            conn.commit()
-            
-        finally:
-            conn.close()
+        # One lock covers the cached count and the pending buffer, so
+        # concurrent increments (and a flush in between) aren't lost
+        with self.flusher.lock:
+            count = self._usage_on(user_id, today) + 1
+            self.flusher.add(user_id, today)
+            self._usage_today.set((user_id, today), count)
     
     def can_search(self, user_id: int, tier: str) -> tuple[bool, str]:
         """Check if user can perform a search."""
@@ -332,48 +708,42 @@ class UsageTracker:
         report_path: str
     ):
         """Add research to user's history."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT INTO research_history 
-                (user_id, query, tier, word_count, sources_count, report_path)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, query, tier, word_count, sources_count, report_path))
+        with self.pool.acquire(write=True) as conn:
+            cursor = conn.cursor()
             
-            conn.commit()
+            cursor.execute(SQL_INSERT_HISTORY, (user_id, query, tier, word_count, sources_count, report_path))
             
-        finally:
-            conn.close()
+            conn.commit()
     
     def get_research_history(self, user_id: int, limit: int = 20) -> list:
         """Get user's research history."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                SELECT query, tier, word_count, sources_count, created_at, report_path
-                FROM research_history
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            ''', (user_id, limit))
-            
-            rows = cursor.fetchall()
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
             
-            return [{
-                "query": row[0],
-                "tier": row[1],
-                "word_count": row[2],
-                "sources_count": row[3],
-                "created_at": row[4],
-                "report_path": row[5]
-            } for row in rows]
+            cursor.execute(SQL_SELECT_HISTORY, (user_id, limit))
             
-        finally:
-            conn.close()
+            return [dict(row) for row in cursor.fetchall()]
+
+
+class PrecomputedHMAC(HMACAlgorithm):
+    """
+    HS256 whose key is an hmac object keyed once up front.
+    
+    PyJWT's HMACAlgorithm calls hmac.new(key, ...) for every token, redoing
+    the ipad/opad key setup; copying a pre-keyed hmac skips it.
+    """
+    
+    def __init__(self):
+        super().__init__(HMACAlgorithm.SHA256)
+    
+    def prepare_key(self, key: Any) -> Any:
+        # Already a keyed hmac object (see JWTManager)
+        return key
+    
+    def sign(self, msg: bytes, key: Any) -> bytes:
+        mac = key.copy()
+        mac.update(msg)
+        return mac.digest()
 
 
 class JWTManager:
@@ -381,6 +751,14 @@ class JWTManager:
     
     def __init__(self, secret_key: Optional[str] = None):
         self.secret_key = secret_key or secrets.token_hex(32)
+        self._token_cache = TTLCache(maxsize=1024, ttl=TOKEN_CACHE_TTL)
+        # HMAC-SHA256 key schedule computed once; OpenSSL does the hashing
+        self._mac = hmac.new(self.secret_key.encode(), digestmod="sha256")
+        self._hs256 = PrecomputedHMAC()
+        self._jws = jwt.PyJWS(algorithms=[])
+        self._jws.register_algorithm("HS256", self._hs256)
+        # The header never changes, so it is serialized and encoded once
+        self._header_b64 = base64url_encode(b'{"alg":"HS256","typ":"JWT"}')
     
     def generate_token(self, user_id: int, username: str, tier: str) -> str:
         """Generate JWT token."""
@@ -388,16 +766,46 @@ class JWTManager:
             "user_id": user_id,
             "username": username,
             "tier": tier,
-            "exp": datetime.utcnow() + timedelta(days=7)
+            "exp": int(time.time()) + TOKEN_LIFETIME_SECONDS
         }
         
-        return jwt.encode(payload, self.secret_key, algorithm="HS256")
+        signing_input = self._header_b64 + b"." + base64url_encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        )
+        signature = self._hs256.sign(signing_input, self._mac)
+        return (signing_input + b"." + base64url_encode(signature)).decode()
+    
+    def _decode(self, token: str) -> Dict[str, Any]:
+        """Check a token's signature and expiry and return its payload."""
+        try:
+            payload = json.loads(self._jws.decode(token, self._mac, algorithms=["HS256"]))
+        except ValueError as e:
+            raise jwt.DecodeError(f"Invalid payload: {e}") from e
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload")
+        
+        exp = payload.get("exp")
+        if exp is not None:
+            if not isinstance(exp, (int, float)):
+                raise jwt.DecodeError("Expiration Time claim (exp) must be an integer.")
+            if exp <= time.time():
+                raise jwt.ExpiredSignatureError("Signature has expired")
+        return payload
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Verify and decode JWT token."""
+        """Verify and decode JWT token (decoded payloads are cached briefly)."""
+        cached = self._token_cache.get(token)
+        if cached is not None:
+            return dict(cached)
+        
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=["HS256"])
-            return payload
+            payload = self._decode(token)
+            # Never serve a cached payload past its own expiry
+            exp = payload.get("exp")
+            ttl = TOKEN_CACHE_TTL if exp is None else min(TOKEN_CACHE_TTL, exp - time.time())
+            if ttl > 0:
+                self._token_cache.set(token, payload, ttl)
+            return dict(payload)
         except jwt.ExpiredSignatureError:
             logger.warning("Token expired")
             return None
@@ -406,6 +814,30 @@ class JWTManager:
             return None
 
 
+# Password character classes as flags, in the order they are reported
+_PW_UPPER, _PW_LOWER, _PW_DIGIT, _PW_SPECIAL = 1, 2, 4, 8
+_PW_SPECIAL_CHARS = '!@#$%^&*(),.?":{}|<>'
+
+# byte -> class flag, so an ASCII password is classified in one translate() pass
+_PW_CLASS_TABLE = bytes(
+    _PW_UPPER if 65 <= b <= 90 else
+    _PW_LOWER if 97 <= b <= 122 else
+    _PW_DIGIT if 48 <= b <= 57 else
+    _PW_SPECIAL if chr(b) in _PW_SPECIAL_CHARS else 0
+    for b in range(256)
+)
+
+# Non-ASCII passwords keep the regex semantics (\d also matches Unicode digits)
+_PW_CLASS_RES = (
+    (_PW_UPPER, re.compile(r"[A-Z]")),
+    (_PW_LOWER, re.compile(r"[a-z]")),
+    (_PW_DIGIT, re.compile(r"\d")),
+    (_PW_SPECIAL, re.compile(r"[!@#$%^&*(),.?\":{}|<>]")),
+)
+
+_RE_EMAIL = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
 class PasswordValidator:
     """Validate password strength."""
     
@@ -423,16 +855,21 @@ class PasswordValidator:
         if len(password) < 8:
             return False, "Password must be at least 8 characters long"
         
-        if not re.search(r"[A-Z]", password):
+        if password.isascii():
+            found = set(password.encode().translate(_PW_CLASS_TABLE))
+        else:
+            found = {flag for flag, regex in _PW_CLASS_RES if regex.search(password)}
+        
+        if _PW_UPPER not in found:
             return False, "Password must contain at least one uppercase letter"
         
-        if not re.search(r"[a-z]", password):
+        if _PW_LOWER not in found:
             return False, "Password must contain at least one lowercase letter"
         
-        if not re.search(r"\d", password):
+        if _PW_DIGIT not in found:
             return False, "Password must contain at least one digit"
         
-        if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
+        if _PW_SPECIAL not in found:
             return False, "Password must contain at least one special character"
         
         return True, "Password is strong"
@@ -444,9 +881,7 @@ class EmailValidator:
     @staticmethod
     def validate(email: str) -> tuple[bool, str]:
         """Validate email format."""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        
-        if re.match(pattern, email):
+        if _RE_EMAIL.match(email):
             return True, "Valid email"
         else:
             return False, "Invalid email format"
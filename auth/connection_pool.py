@@ -0,0 +1,123 @@
+"""
+SQLite Connection Pool
+Keeps pre-opened, pre-configured connections to the user database so the auth
+and usage classes don't connect/close on every call.
+"""
+
+import os
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+from typing import Dict, Iterator
+import logging
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Compiled statements kept per connection (sqlite3 default: 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Applied to every pooled connection when it is opened. auto_vacuum has to
+# come before anything writes to a new file (existing files keep their mode)
+# and lets deletes hand pages back via PRAGMA incremental_vacuum
+CONNECTION_PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA foreign_keys=ON",
+)
+# Writer only: checkpoint the WAL back into the database every N pages
+WRITER_PRAGMAS = (
+    "PRAGMA wal_autocheckpoint=1000",
+)
+# Readers only: refuse writes outright
+READER_PRAGMAS = (
+    "PRAGMA query_only=1",
+)
+
+
+class ConnectionPool:
+    """
+    Fixed pool of SQLite connections: one writer plus N readers.
+    
+    Writes go through the single writer connection (serialized by a lock),
+    so concurrent writers queue in-process instead of hitting SQLITE_BUSY;
+    WAL mode lets the reader connections run alongside it. Readers are
+    query-only and in autocommit mode, so they never open a transaction.
+    """
+    
+    def __init__(self, db_path: str, readers: int = config.AUTH_DB_POOL_SIZE):
+        """
+        Open the pool's connections.
+        
+        Args:
+            db_path: SQLite database file
+            readers: Number of reader connections
+        """
+        self.db_path = db_path
+        self._writer = self._connect()
+        self._write_lock = threading.Lock()
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(readers, 1)):
+            self._readers.put(self._connect(readonly=True))
+    
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        """Open and configure one connection."""
+        # Connections move between Streamlit's script threads
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        # Rows index by position or column name, built in C
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS + (READER_PRAGMAS if readonly else WRITER_PRAGMAS):
+            conn.execute(pragma)
+        if readonly:
+            conn.isolation_level = None
+        return conn
+    
+    @contextmanager
+    def acquire(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection for the duration of a with-block.
+        
+        Args:
+            write: Use the writer connection (needed for any INSERT/UPDATE/DELETE)
+        
+        Yields:
+            sqlite3.Connection; uncommitted work is rolled back on error
+        """
+        if write:
+            with self._write_lock:
+                yield from self._borrow(self._writer)
+        else:
+            conn = self._readers.get()
+            try:
+                yield from self._borrow(conn)
+            finally:
+                self._readers.put(conn)
+    
+    @staticmethod
+    def _borrow(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        """Yield a connection, leaving no open transaction behind on error."""
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+# One pool per database file, shared by every class that opens it
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(db_path: str) -> ConnectionPool:
+    """Get the shared connection pool for a database file."""
+    db_path = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = ConnectionPool(db_path)
+        return pool
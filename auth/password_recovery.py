@@ -5,12 +5,33 @@ Provides token-based password reset functionality.
 
 import secrets
 import hashlib
-from datetime import datetime, timedelta
+import time
+import threading
 from typing import Optional, Dict, Any
 import logging
 
+from auth.authentication import SQL_SET_PASSWORD, hash_password
+
 logger = logging.getLogger(__name__)
 
+# Check-and-consume in one statement, so a token can't be used twice
+SQL_CONSUME_TOKEN = """
+    UPDATE password_reset_tokens
+    SET used = 1
+    WHERE token_hash = ? AND used = 0 AND expires_at > ?
+    RETURNING user_id
+"""
+
+# Expired and used reset tokens are purged this often (seconds)
+TOKEN_CLEANUP_INTERVAL = 3600
+# Free pages returned to the filesystem after each purge
+TOKEN_CLEANUP_VACUUM_PAGES = 1000
+
+
+def hash_token(token: str) -> bytes:
+    """Digest stored for a reset token, so the raw token never hits the DB."""
+    return hashlib.sha256(token.encode()).digest()
+
 
 class PasswordRecovery:
     """Handle password recovery with secure tokens."""
@@ -25,25 +46,52 @@ class PasswordRecovery:
         self.db = db
         self.token_validity_hours = 1  # Reset tokens valid for 1 hour
         self._create_table()
+        self._start_cleanup()
     
     def _create_table(self):
         """Create password recovery tokens table."""
-        import sqlite3
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS password_reset_tokens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                token TEXT NOT NULL UNIQUE,
-                created_at TEXT NOT NULL,
-                expires_at TEXT NOT NULL,
-                used INTEGER DEFAULT 0,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
-        conn.commit()
-        conn.close()
+        with self.db.pool.acquire(write=True) as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(password_reset_tokens)")}
+            if "token" in columns:
+                # Old layout stored raw tokens; outstanding ones (valid for an hour) are dropped
+                conn.execute("DROP TABLE password_reset_tokens")
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS password_reset_tokens (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    token_hash BLOB NOT NULL UNIQUE,
+                    created_at INTEGER NOT NULL,
+                    expires_at INTEGER NOT NULL,
+                    used INTEGER DEFAULT 0,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            """)
+            
+            # Partial indexes covering exactly the rows cleanup deletes
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_prt_expires
+                ON password_reset_tokens(expires_at) WHERE used = 0
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_prt_used
+                ON password_reset_tokens(id) WHERE used = 1
+            """)
+            conn.commit()
+    
+    def _start_cleanup(self):
+        """Purge tokens periodically in the background (one thread per database)."""
+        with _cleanup_lock:
+            if id(self.db.pool) in _cleanup_threads:
+                return
+            thread = threading.Thread(target=self._cleanup_loop, name="reset-token-cleanup", daemon=True)
+            _cleanup_threads[id(self.db.pool)] = thread
+        thread.start()
+    
+    def _cleanup_loop(self):
+        while True:
+            self.cleanup_expired_tokens()
+            time.sleep(TOKEN_CLEANUP_INTERVAL)
     
     def generate_reset_token(self, email: str) -> Optional[str]:
         """
@@ -66,26 +114,23 @@ class PasswordRecovery:
         # Generate secure token
         token = secrets.token_urlsafe(32)
         
-        # Calculate expiry
-        created_at = datetime.now()
-        expires_at = created_at + timedelta(hours=self.token_validity_hours)
+        # Calculate expiry (Unix epoch seconds)
+        created_at = int(time.time())
+        expires_at = created_at + self.token_validity_hours * 3600
         
         # Store token
         try:
-            import sqlite3
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO password_reset_tokens (user_id, token, created_at, expires_at)
-                VALUES (?, ?, ?, ?)
-            """, (
-                user_id,
-                token,
-                created_at.isoformat(),
-                expires_at.isoformat()
-            ))
-            conn.commit()
-            conn.close()
+            with self.db.pool.acquire(write=True) as conn:
+                conn.execute("""
+                    INSERT INTO password_reset_tokens (user_id, token_hash, created_at, expires_at)
+                    VALUES (?, ?, ?, ?)
+                """, (
+                    user_id,
+                    hash_token(token),
+                    created_at,
+                    expires_at
+                ))
+                conn.commit()
             
             logger.info(f"Reset token generated for user {user_id}")
             return token
@@ -105,17 +150,12 @@ class PasswordRecovery:
             User ID if valid, None otherwise
         """
         try:
-            import sqlite3
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT user_id, expires_at, used
-                FROM password_reset_tokens
-                WHERE token = ?
-            """, (token,))
-            
-            result = cursor.fetchone()
-            conn.close()
+            with self.db.pool.acquire() as conn:
+                result = conn.execute("""
+                    SELECT user_id, expires_at, used
+                    FROM password_reset_tokens
+                    WHERE token_hash = ?
+                """, (hash_token(token),)).fetchone()
             
             if not result:
                 logger.warning("Invalid reset token")
@@ -129,8 +169,7 @@ class PasswordRecovery:
                 return None
             
             # Check expiry
-            expires_at_dt = datetime.fromisoformat(expires_at)
-            if datetime.now() > expires_at_dt:
+            if time.time() > expires_at:
                 logger.warning("Reset token expired")
                 return None
             
@@ -151,32 +190,25 @@ class PasswordRecovery:
         Returns:
             True if successful, False otherwise
         """
-        # Validate token
-        user_id = self.validate_token(token)
-        if not user_id:
-            return False
+        # Hash outside the write lock
+        password_hash = hash_password(new_password.encode())
         
         try:
-            # Update password
-            success = self.db.update_password(user_id, new_password)
-            
-            if success:
-                # Mark token as used
-                import sqlite3
-                conn = sqlite3.connect(self.db.db_path)
-                cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE password_reset_tokens
-                    SET used = 1
-                    WHERE token = ?
-                """, (token,))
-                conn.commit()
-                conn.close()
+            # Consume the token and set the password in one transaction
+            with self.db.pool.acquire(write=True) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute(SQL_CONSUME_TOKEN, (hash_token(token), int(time.time()))).fetchall()
+                if not rows:
+                    conn.rollback()
+                    logger.warning("Invalid, used or expired reset token")
+                    return False
                 
-                logger.info(f"Password reset successful for user {user_id}")
-                return True
+                user_id = rows[0][0]
+                conn.execute(SQL_SET_PASSWORD, (password_hash, user_id))
+                conn.commit()
             
-            return False
+            logger.info(f"Password reset successful for user {user_id}")
+            return True
         
         except Exception as e:
             logger.error(f"Password reset failed: {e}")
@@ -185,19 +217,24 @@ class PasswordRecovery:
     def cleanup_expired_tokens(self):
         """Remove expired and used tokens."""
         try:
-            import sqlite3
-            now = datetime.now().isoformat()
-            
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                DELETE FROM password_reset_tokens
-                WHERE expires_at < ? OR used = 1
-            """, (now,))
+            now = int(time.time())
             
-            deleted = cursor.rowcount
-            conn.commit()
-            conn.close()
+            with self.db.pool.acquire(write=True) as conn:
+                # Two deletes so each one is an index range over a partial index
+                deleted = conn.execute("""
+                    DELETE FROM password_reset_tokens
+                    WHERE used = 0 AND expires_at < ?
+                """, (now,)).rowcount
+                deleted += conn.execute("""
+                    DELETE FROM password_reset_tokens
+                    WHERE used = 1
+                """).rowcount
+                conn.commit()
+                
+                if deleted:
+                    # executescript steps the pragma to completion; execute()
+                    # would free a single page
+                    conn.executescript(f"PRAGMA incremental_vacuum({TOKEN_CLEANUP_VACUUM_PAGES})")
             
             logger.info(f"Cleaned up {deleted} expired/used reset tokens")
         
@@ -261,6 +298,11 @@ class PasswordRecovery:
         return self.send_reset_email(email, token)
 
 
+# Databases that already have a cleanup thread, keyed by connection pool
+_cleanup_threads: Dict[int, threading.Thread] = {}
+_cleanup_lock = threading.Lock()
+
+
 class PasswordResetGUI:
     """GUI for password reset flow (optional)."""
     
@@ -1,6 +1,7 @@
 """Configuration management for Auto-Research Agent."""
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -14,9 +15,13 @@ REPORTS_DIR = BASE_DIR / "reports"
 LOGS_DIR = BASE_DIR / "logs"
 DB_DIR = BASE_DIR / "database"
 
-# Create directories if they don't exist
-for directory in [OUTPUT_DIR, REPORTS_DIR, LOGS_DIR, DB_DIR]:
-    directory.mkdir(exist_ok=True)
+
+@lru_cache(maxsize=1)
+def ensure_dirs():
+    """Create the output directories if they don't exist (once per process)."""
+    for directory in [OUTPUT_DIR, REPORTS_DIR, LOGS_DIR, DB_DIR]:
+        directory.mkdir(exist_ok=True)
+
 
 # Subscription Configuration
 SUBSCRIPTION_TIER = os.getenv("SUBSCRIPTION_TIER", "free")
@@ -44,6 +49,24 @@ TIMEOUT_SECONDS = int(os.getenv("TIMEOUT_SECONDS", "30"))
 TEMPERATURE = 0.7
 MAX_TOKENS = 4096
 
+# Maximum concurrent LLM requests per agent
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "8"))
+# Maximum concurrent LLM requests across all agents in one event loop
+MAX_INFLIGHT_LLM_CALLS = int(os.getenv("MAX_INFLIGHT_LLM_CALLS", "16"))
+
+# Provider prompt caching (Anthropic cache_control TTL: "5m" or "1h")
+PROMPT_CACHE_TTL = os.getenv("PROMPT_CACHE_TTL", "5m")
+
+# Reader connections kept open to the user database (plus one writer)
+AUTH_DB_POOL_SIZE = int(os.getenv("AUTH_DB_POOL_SIZE", "4"))
+
+# Password hashing: minimum bcrypt cost, raised at startup to the largest cost
+# that still hashes within the time budget (0 disables calibration)
+BCRYPT_COST = int(os.getenv("BCRYPT_COST", "10"))
+BCRYPT_TIME_BUDGET_MS = int(os.getenv("BCRYPT_TIME_BUDGET_MS", "150"))
+# Threads dedicated to password hashing/verification
+KDF_WORKERS = int(os.getenv("KDF_WORKERS", "4"))
+
 # Citation Formats
 CITATION_FORMATS = ["APA", "MLA", "IEEE"]
 DEFAULT_CITATION_FORMAT = "APA"
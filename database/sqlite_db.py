@@ -1,11 +1,79 @@
 """SQLite database for storing research history."""
 
 import sqlite3
-import json
+import asyncio
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Callable
 import config
+from utils.json_utils import json_dumps
+
+# Applied to every connection. journal_mode=WAL persists in the file;
+# the rest are per-connection settings
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-20000",
+)
+
+# Statements on the hot paths, kept as constants so the connection's
+# compiled-statement cache (cached_statements) hits on every call
+STATEMENT_CACHE_SIZE = 256
+# Sessions whose last-written JSON columns are remembered by update_session
+SESSION_CACHE_SIZE = 256
+# A session that reaches one of these is not updated again
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
+SQL_INSERT_SESSION = "INSERT INTO research_sessions (query) VALUES (?)"
+SQL_INSERT_SOURCE = """INSERT INTO sources
+   (session_id, url, title, summary, confidence_score)
+   VALUES (?, ?, ?, ?, ?)"""
+SQL_INSERT_FACT = """INSERT INTO facts
+   (session_id, fact, confidence_score, supporting_sources, has_contradiction)
+   VALUES (?, ?, ?, ?, ?)"""
+
+# Word characters FTS5's default tokenizer indexes; punctuation is dropped
+_WORD_CHAR_RE = re.compile(r'\w')
+# Words with fewer word characters than this aren't prefix-expanded
+FTS_MIN_PREFIX_CHARS = 2
+
+
+def _fts_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression.
+    
+    Every word must appear; words are quoted so FTS5 operators and
+    punctuation in the input are matched literally. Words with at least
+    FTS_MIN_PREFIX_CHARS word characters also match as a prefix; shorter
+    ones (e.g. "C++", which the tokenizer reduces to "c") must match exactly.
+    
+    Returns:
+        The expression, or None if no word is long enough to search
+        by prefix (the caller falls back to a substring match)
+    """
+    terms = []
+    prefix_terms = 0
+    for word in text.split():
+        term = '"' + word.replace('"', '""') + '"'
+        if len(_WORD_CHAR_RE.findall(word)) >= FTS_MIN_PREFIX_CHARS:
+            term += "*"
+            prefix_terms += 1
+        terms.append(term)
+    return " ".join(terms) if prefix_terms else None
+
+
+@lru_cache(maxsize=64)
+def _update_session_sql(columns: tuple) -> str:
+    """UPDATE statement for a combination of research_sessions columns."""
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    return f"UPDATE research_sessions SET {assignments} WHERE id = ?"
 
 
 class ResearchDatabase:
@@ -17,14 +85,87 @@ class ResearchDatabase:
         self.db_path = db_path or config.DATABASE_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # One long-lived connection; SQLite has a single writer anyway, so
+        # calls are serialized by a lock instead of each opening the file
+        self._conn = self._connect()
+        self._conn_lock = threading.Lock()
+        # Per event loop: async writers queue on an asyncio.Lock rather than
+        # each parking a worker thread on _conn_lock
+        self._write_locks = weakref.WeakKeyDictionary()
+        # session_id -> {column: JSON last written}, so update_session can
+        # drop output_files/metadata when a caller re-passes the same dict;
+        # LRU-bounded, and finished sessions are dropped
+        self._session_cache: "OrderedDict[int, Dict[str, str]]" = OrderedDict()
+        
         self._init_database()
         
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the WAL/sync/cache pragmas applied."""
+        
+        # Autocommit: each statement is its own transaction unless BEGIN is issued
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+        
+    @contextmanager
+    def _cursor(self) -> Iterator[sqlite3.Cursor]:
+        """Hold the shared connection for the duration of a with-block."""
+        
+        with self._conn_lock:
+            cursor = self._conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+                
+    def _executemany(self, sql: str, rows: List[tuple]):
+        """Insert many rows in a single transaction (one commit for the batch)."""
+        
+        if not rows:
+            return
+        
+        with self._cursor() as cursor:
+            cursor.execute("BEGIN")
+            try:
+                cursor.executemany(sql, rows)
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+                
+    async def _awrite(self, method: Callable, *args, **kwargs):
+        """Run a blocking write method in a worker thread, one at a time."""
+        
+        loop = asyncio.get_running_loop()
+        lock = self._write_locks.get(loop)
+        if lock is None:
+            lock = self._write_locks[loop] = asyncio.Lock()
+        
+        async with lock:
+            return await asyncio.to_thread(method, *args, **kwargs)
+            
+    def close(self):
+        """Close the shared connection."""
+        
+        with self._conn_lock:
+            self._conn.close()
+            
+    def __del__(self):
+        conn = getattr(self, "_conn", None)
+        if conn is not None:
+            conn.close()
+        
     def _init_database(self):
         """Create tables if they don't exist."""
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
+        with self._cursor() as cursor:
             # Research sessions table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS research_sessions (
@@ -69,7 +210,46 @@ class ResearchDatabase:
                 )
             """)
             
-            conn.commit()
+            # Per-session lookups and newest-first listing
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sources_session ON sources(session_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_facts_session ON facts(session_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_created ON research_sessions(created_at)")
+            
+            self._create_search_index(cursor)
+            
+    @staticmethod
+    def _create_search_index(cursor: sqlite3.Cursor):
+        """Full-text index over session queries, kept in sync by triggers."""
+        
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sessions_fts'"
+        ).fetchone()
+        
+        # External-content table: the text lives in research_sessions only
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS sessions_fts
+            USING fts5(query, content='research_sessions', content_rowid='id')
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS research_sessions_ai AFTER INSERT ON research_sessions BEGIN
+                INSERT INTO sessions_fts(rowid, query) VALUES (new.id, new.query);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS research_sessions_ad AFTER DELETE ON research_sessions BEGIN
+                INSERT INTO sessions_fts(sessions_fts, rowid, query) VALUES ('delete', old.id, old.query);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS research_sessions_au AFTER UPDATE OF query ON research_sessions BEGIN
+                INSERT INTO sessions_fts(sessions_fts, rowid, query) VALUES ('delete', old.id, old.query);
+                INSERT INTO sessions_fts(rowid, query) VALUES (new.id, new.query);
+            END
+        """)
+        
+        if not exists:
+            # Index sessions recorded before the FTS table existed
+            cursor.execute("INSERT INTO sessions_fts(sessions_fts) VALUES ('rebuild')")
             
     def create_session(self, query: str) -> int:
         """
@@ -82,13 +262,8 @@ class ResearchDatabase:
             Session ID
         """
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO research_sessions (query) VALUES (?)",
-                (query,)
-            )
-            conn.commit()
+        with self._cursor() as cursor:
+            cursor.execute(SQL_INSERT_SESSION, (query,))
             return cursor.lastrowid
             
     def update_session(
@@ -103,46 +278,62 @@ class ResearchDatabase:
     ):
         """Update a research session."""
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            updates = []
-            params = []
+        columns = []
+        params = []
+        
+        if status:
+            columns.append("status")
+            params.append(status)
             
-            if status:
-                updates.append("status = ?")
-                params.append(status)
-                
-                if status == "completed":
-                    updates.append("completed_at = ?")
-                    params.append(datetime.now())
-                    
-            if coverage_score is not None:
-                updates.append("coverage_score = ?")
-                params.append(coverage_score)
+            if status == "completed":
+                columns.append("completed_at")
+                params.append(datetime.now())
                 
-            if sources_count is not None:
-                updates.append("sources_count = ?")
-                params.append(sources_count)
-                
-            if facts_count is not None:
-                updates.append("facts_count = ?")
-                params.append(facts_count)
-                
-            if output_files is not None:
-                updates.append("output_files = ?")
-                params.append(json.dumps(output_files))
-                
-            if metadata is not None:
-                updates.append("metadata = ?")
-                params.append(json.dumps(metadata))
+        if coverage_score is not None:
+            columns.append("coverage_score")
+            params.append(coverage_score)
+            
+        if sources_count is not None:
+            columns.append("sources_count")
+            params.append(sources_count)
+            
+        if facts_count is not None:
+            columns.append("facts_count")
+            params.append(facts_count)
+            
+        cached = self._session_cache.get(session_id, {})
+        serialized = {}
+        for column, value in (("output_files", output_files), ("metadata", metadata)):
+            if value is None:
+                continue
+            # Columns are TEXT, so store str rather than orjson's bytes
+            encoded = json_dumps(value).decode()
+            if cached.get(column) != encoded:
+                columns.append(column)
+                params.append(encoded)
+                serialized[column] = encoded
+            
+        if columns:
+            params.append(session_id)
+            # Columns are appended in a fixed order, so each combination maps
+            # to one cached SQL string
+            with self._cursor() as cursor:
+                cursor.execute(_update_session_sql(tuple(columns)), params)
                 
-            if updates:
-                params.append(session_id)
-                query = f"UPDATE research_sessions SET {', '.join(updates)} WHERE id = ?"
-                cursor.execute(query, params)
-                conn.commit()
+                # Still under the connection lock, which also guards the cache
+                if status in TERMINAL_STATUSES:
+                    self._session_cache.pop(session_id, None)
+                elif serialized:
+                    self._session_cache.setdefault(session_id, {}).update(serialized)
+                    self._session_cache.move_to_end(session_id)
+                    if len(self._session_cache) > SESSION_CACHE_SIZE:
+                        self._session_cache.popitem(last=False)
                 
+    async def aupdate_session(self, session_id: int, **fields):
+        """Async update_session() that doesn't block the event loop."""
+        
+        await self._awrite(self.update_session, session_id, **fields)
+        
     def add_source(
         self,
         session_id: int,
@@ -153,16 +344,43 @@ class ResearchDatabase:
     ):
         """Add a source to a session."""
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """INSERT INTO sources 
-                   (session_id, url, title, summary, confidence_score)
-                   VALUES (?, ?, ?, ?, ?)""",
-                (session_id, url, title, summary, confidence_score)
-            )
-            conn.commit()
+        self.add_sources(session_id, [{
+            "url": url,
+            "title": title,
+            "summary": summary,
+            "confidence_score": confidence_score
+        }])
+        
+    def add_sources(self, session_id: int, sources: List[Dict[str, Any]]):
+        """
+        Add many sources to a session in one transaction.
+        
+        Args:
+            session_id: Session ID
+            sources: Dicts with "url" and optional "title", "summary", "confidence_score"
+        """
+        
+        self._executemany(
+            SQL_INSERT_SOURCE,
+            [(
+                session_id,
+                source["url"],
+                source.get("title"),
+                source.get("summary"),
+                source.get("confidence_score")
+            ) for source in sources]
+        )
             
+    async def aadd_source(self, session_id: int, url: str, **fields):
+        """Async add_source() that doesn't block the event loop."""
+        
+        await self._awrite(self.add_source, session_id, url, **fields)
+        
+    async def aadd_sources(self, session_id: int, sources: List[Dict[str, Any]]):
+        """Async add_sources() that doesn't block the event loop."""
+        
+        await self._awrite(self.add_sources, session_id, sources)
+        
     def add_fact(
         self,
         session_id: int,
@@ -173,23 +391,48 @@ class ResearchDatabase:
     ):
         """Add a verified fact to a session."""
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """INSERT INTO facts 
-                   (session_id, fact, confidence_score, supporting_sources, has_contradiction)
-                   VALUES (?, ?, ?, ?, ?)""",
-                (session_id, fact, confidence_score, supporting_sources, has_contradiction)
-            )
-            conn.commit()
+        self.add_facts(session_id, [{
+            "fact": fact,
+            "confidence_score": confidence_score,
+            "supporting_sources": supporting_sources,
+            "has_contradiction": has_contradiction
+        }])
+        
+    def add_facts(self, session_id: int, facts: List[Dict[str, Any]]):
+        """
+        Add many verified facts to a session in one transaction.
+        
+        Args:
+            session_id: Session ID
+            facts: Dicts with "fact", "confidence_score" and optional
+                "supporting_sources" (default 1), "has_contradiction" (default False)
+        """
+        
+        self._executemany(
+            SQL_INSERT_FACT,
+            [(
+                session_id,
+                fact["fact"],
+                fact["confidence_score"],
+                fact.get("supporting_sources", 1),
+                fact.get("has_contradiction", False)
+            ) for fact in facts]
+        )
             
+    async def aadd_fact(self, session_id: int, fact: str, confidence_score: float, **fields):
+        """Async add_fact() that doesn't block the event loop."""
+        
+        await self._awrite(self.add_fact, session_id, fact, confidence_score, **fields)
+        
+    async def aadd_facts(self, session_id: int, facts: List[Dict[str, Any]]):
+        """Async add_facts() that doesn't block the event loop."""
+        
+        await self._awrite(self.add_facts, session_id, facts)
+        
     def get_session(self, session_id: int) -> Optional[Dict]:
         """Get a research session by ID."""
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
+        with self._cursor() as cursor:
             cursor.execute(
                 "SELECT * FROM research_sessions WHERE id = ?",
                 (session_id,)
@@ -204,10 +447,7 @@ class ResearchDatabase:
     def get_recent_sessions(self, limit: int = 10) -> List[Dict]:
         """Get recent research sessions."""
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
+        with self._cursor() as cursor:
             cursor.execute(
                 """SELECT * FROM research_sessions 
                    ORDER BY created_at DESC 
@@ -218,17 +458,28 @@ class ResearchDatabase:
             return [dict(row) for row in cursor.fetchall()]
             
     def search_sessions(self, query: str) -> List[Dict]:
-        """Search sessions by query text."""
+        """Search sessions by query text (every word, matched by word prefix)."""
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                """SELECT * FROM research_sessions 
-                   WHERE query LIKE ? 
-                   ORDER BY created_at DESC""",
-                (f"%{query}%",)
-            )
+        match = _fts_query(query)
+        
+        with self._cursor() as cursor:
+            if not query.strip():
+                cursor.execute("SELECT * FROM research_sessions ORDER BY created_at DESC")
+            elif match is None:
+                # Only short or punctuation-heavy words ("C++", "R"): substring match
+                cursor.execute(
+                    """SELECT * FROM research_sessions
+                       WHERE query LIKE ?
+                       ORDER BY created_at DESC""",
+                    (f"%{query.strip()}%",)
+                )
+            else:
+                cursor.execute(
+                    """SELECT s.* FROM research_sessions s
+                       JOIN sessions_fts f ON s.id = f.rowid
+                       WHERE sessions_fts MATCH ?
+                       ORDER BY s.created_at DESC""",
+                    (match,)
+                )
             
             return [dict(row) for row in cursor.fetchall()]
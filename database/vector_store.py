@@ -1,11 +1,17 @@
 """FAISS vector store for semantic search."""
 
+import asyncio
+import hashlib
+import sqlite3
+import weakref
+from collections import OrderedDict
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
-import json
 import pickle
 
+from utils.json_utils import json_dumps, json_loads
+
 
 try:
     import faiss
@@ -13,19 +19,51 @@ try:
 except ImportError:
     FAISS_AVAILABLE = False
 
+# faiss.index_factory spec for new indexes: "HNSW32" is a graph index with
+# sublinear search, and ",SQfp16" stores its vectors as float16 (half the
+# memory and scan bandwidth of float32, recall is unaffected at k=5).
+# "HNSW32,SQ8" quarters it and "IVF1024,PQ64" trades recall for ~100x less;
+# both are trained on the first batch added (IVF1024 needs >= 1024 vectors).
+# "Flat" is the exact float32 brute-force scan. Indexes use inner product
+# over L2-normalized vectors, i.e. cosine similarity
+DEFAULT_INDEX_FACTORY = "HNSW32,SQfp16"
+# HNSW build/search breadth (higher = better recall, slower)
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+# Embedding requests made within this window (seconds) share one API call,
+# sent early once this many texts are waiting
+EMBED_BATCH_WINDOW = 0.01
+EMBED_BATCH_SIZE = 64
+# Embeddings kept in memory (~6 KB each); with an index_path all of them are
+# also persisted next to the index
+EMBED_CACHE_SIZE = 4096
+
+
+def _embedding_key(text: str) -> str:
+    """Cache key for a text's embedding under EMBEDDING_MODEL."""
+    return hashlib.blake2b(f"{EMBEDDING_MODEL}\0{text}".encode(), digest_size=16).hexdigest()
+
 
 class VectorStore:
     """
     Manages FAISS vector store for semantic search over research content.
     """
     
-    def __init__(self, dimension: int = 1536, index_path: Optional[Path] = None):
+    def __init__(
+        self,
+        dimension: int = 1536,
+        index_path: Optional[Path] = None,
+        index_factory: str = DEFAULT_INDEX_FACTORY
+    ):
         """
         Initialize vector store.
         
         Args:
             dimension: Vector dimension (1536 for OpenAI embeddings)
             index_path: Path to save/load index
+            index_factory: faiss.index_factory spec for a new index
         """
         
         if not FAISS_AVAILABLE:
@@ -35,13 +73,16 @@ class VectorStore:
         self.index_path = index_path
         
         # Initialize FAISS index
-        self.index = faiss.IndexFlatL2(dimension)
+        self.index = faiss.index_factory(dimension, index_factory, faiss.METRIC_INNER_PRODUCT)
+        if hasattr(self.index, "hnsw"):
+            self.index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            self.index.hnsw.efSearch = HNSW_EF_SEARCH
         
         # Store metadata for each vector
         self.metadata = []
         
         # Load existing index if available
-        if index_path and index_path.exists():
+        if index_path and Path(str(index_path) + ".index").exists():
             self.load()
             
     def add_vectors(
@@ -60,6 +101,16 @@ class VectorStore:
         if vectors.shape[1] != self.dimension:
             raise ValueError(f"Vector dimension mismatch: {vectors.shape[1]} != {self.dimension}")
             
+        # Unit length, so inner product is cosine similarity (copy: the
+        # caller's array is left as-is)
+        vectors = np.array(vectors, dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        
+        # Vectors go in as float32; quantized storage (SQ/PQ) compresses them
+        # internally. SQ8/IVF/PQ learn their ranges/codebooks from the first batch
+        if not self.index.is_trained:
+            self.index.train(vectors)
+            
         self.index.add(vectors)
         self.metadata.extend(metadata)
         
@@ -79,23 +130,62 @@ class VectorStore:
             List of results with metadata and distances
         """
         
-        if query_vector.shape[0] != 1:
-            query_vector = query_vector.reshape(1, -1)
+        hits = self.search_arrays(query_vector, k)
+        
+        return [
+            {"rank": rank, "distance": distance, "similarity": similarity, **metadata}
+            for rank, distance, similarity, metadata in zip(
+                hits["ranks"].tolist(),
+                hits["distances"].tolist(),
+                hits["similarities"].tolist(),
+                hits["metadata"]
+            )
+        ]
+        
+    def search_arrays(
+        self,
+        query_vector: np.ndarray,
+        k: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Search for similar vectors, returning columns instead of one dict per hit.
+        
+        Cheaper than search() for large k.
+        
+        Args:
+            query_vector: Query vector of shape (1, dimension)
+            k: Number of results to return
+            
+        Returns:
+            Dict of "ranks", "indices", "distances" and "similarities" arrays
+            plus a "metadata" list, aligned by position
+        """
+        
+        query_vector = np.array(query_vector, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(query_vector)
             
         distances, indices = self.index.search(query_vector, k)
         
-        results = []
-        for i, (dist, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(self.metadata):
-                result = {
-                    "rank": i + 1,
-                    "distance": float(dist),
-                    "similarity": float(1 / (1 + dist)),  # Convert to similarity score
-                    **self.metadata[idx]
-                }
-                results.append(result)
-                
-        return results
+        # FAISS pads missing results with -1
+        indices = indices[0]
+        valid = (indices >= 0) & (indices < len(self.metadata))
+        indices = indices[valid]
+        scores = distances[0][valid].astype(np.float64)
+        
+        # Inner-product indexes score by cosine similarity directly; indexes
+        # saved before the switch still return L2 distances
+        if self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            similarities, distances = scores, 1.0 - scores
+        else:
+            similarities, distances = 1.0 / (1.0 + scores), scores
+            
+        return {
+            "ranks": np.flatnonzero(valid) + 1,
+            "indices": indices,
+            "distances": distances,
+            "similarities": similarities,
+            "metadata": [self.metadata[i] for i in indices.tolist()]
+        }
         
     def save(self):
         """Save index and metadata to disk."""
@@ -109,10 +199,10 @@ class VectorStore:
         index_file = str(self.index_path) + ".index"
         faiss.write_index(self.index, index_file)
         
-        # Save metadata
-        metadata_file = str(self.index_path) + ".meta"
+        # Save metadata, one JSON object per line
+        metadata_file = str(self.index_path) + ".meta.jsonl"
         with open(metadata_file, 'wb') as f:
-            pickle.dump(self.metadata, f)
+            f.write(b"\n".join(map(json_dumps, self.metadata)))
             
     def load(self):
         """Load index and metadata from disk."""
@@ -121,13 +211,17 @@ class VectorStore:
             raise ValueError("No index path specified")
             
         index_file = str(self.index_path) + ".index"
-        metadata_file = str(self.index_path) + ".meta"
+        metadata_file = Path(str(self.index_path) + ".meta.jsonl")
+        legacy_metadata_file = Path(str(self.index_path) + ".meta")
         
         if Path(index_file).exists():
             self.index = faiss.read_index(index_file)
             
-        if Path(metadata_file).exists():
-            with open(metadata_file, 'rb') as f:
+        if metadata_file.exists():
+            self.metadata = [json_loads(line) for line in metadata_file.read_bytes().splitlines()]
+        elif legacy_metadata_file.exists():
+            # Pickled by older versions; the next save() writes JSON lines
+            with open(legacy_metadata_file, 'rb') as f:
                 self.metadata = pickle.load(f)
                 
     def clear(self):
@@ -159,6 +253,22 @@ class ResearchVectorStore:
         self.llm_client = llm_client
         self.store = VectorStore(dimension=1536, index_path=index_path)
         
+        # Per event loop: texts waiting for the next batched embeddings call
+        # (futures are bound to the loop that created them)
+        self._embed_pending = weakref.WeakKeyDictionary()
+        self._embed_tasks = set()
+        
+        # Identical texts (re-scraped URLs, repeated queries) are embedded once
+        self._embed_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._embed_db = None
+        if index_path:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            self._embed_db = sqlite3.connect(str(index_path) + ".embeddings.db", check_same_thread=False)
+            self._embed_db.execute(
+                "CREATE TABLE IF NOT EXISTS embed_cache (hash TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+            )
+            self._embed_db.commit()
+        
     async def add_summaries(self, summaries: List[Dict[str, Any]]):
         """
         Add research summaries to vector store.
@@ -218,6 +328,10 @@ class ResearchVectorStore:
         """
         Get embeddings from OpenAI.
         
+        Previously embedded texts are served from the cache. The rest are
+        queued and embedded together with any other requests made within
+        EMBED_BATCH_WINDOW, so concurrent searches cost one round trip.
+        
         Args:
             texts: List of texts to embed
             
@@ -225,17 +339,115 @@ class ResearchVectorStore:
             Numpy array of embeddings
         """
         
-        response = await self.llm_client.embeddings.create(
-            model="text-embedding-3-small",
-            input=texts
-        )
+        keys = [_embedding_key(text) for text in texts]
+        found = self._cached_embeddings(keys)
         
-        embeddings = np.array([
-            item.embedding for item in response.data
-        ], dtype=np.float32)
+        # One request per distinct missing text
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = await asyncio.gather(*[self._submit(text) for text in missing.values()])
+            fresh = dict(zip(missing, vectors))
+            self._store_embeddings(fresh)
+            found.update(fresh)
+            
+        return np.vstack([found[key] for key in keys])
         
-        return embeddings
+    def _cached_embeddings(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look keys up in memory, then in the persistent cache."""
         
+        found = {}
+        for key in keys:
+            vector = self._embed_cache.get(key)
+            if vector is not None:
+                self._embed_cache.move_to_end(key)
+                found[key] = vector
+                
+        unresolved = [key for key in set(keys) if key not in found]
+        if unresolved and self._embed_db is not None:
+            placeholders = ",".join("?" * len(unresolved))
+            rows = self._embed_db.execute(
+                f"SELECT hash, vec FROM embed_cache WHERE hash IN ({placeholders})",
+                unresolved
+            ).fetchall()
+            loaded = {key: np.frombuffer(vec, dtype=np.float32) for key, vec in rows}
+            self._remember(loaded)
+            found.update(loaded)
+            
+        return found
+        
+    def _store_embeddings(self, vectors: Dict[str, np.ndarray]):
+        """Add freshly computed embeddings to both cache levels."""
+        
+        self._remember(vectors)
+        if self._embed_db is not None:
+            self._embed_db.executemany(
+                "INSERT OR REPLACE INTO embed_cache (hash, vec) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in vectors.items()]
+            )
+            self._embed_db.commit()
+            
+    def _remember(self, vectors: Dict[str, np.ndarray]):
+        """Insert into the in-memory LRU, evicting the oldest entries."""
+        
+        self._embed_cache.update(vectors)
+        while len(self._embed_cache) > EMBED_CACHE_SIZE:
+            self._embed_cache.popitem(last=False)
+        
+    def _submit(self, text: str) -> asyncio.Future:
+        """Queue a text for the next batch; the future resolves to its embedding."""
+        
+        loop = asyncio.get_running_loop()
+        pending = self._embed_pending.get(loop)
+        if pending is None:
+            pending = self._embed_pending[loop] = []
+            
+        future = loop.create_future()
+        pending.append((text, future))
+        
+        if len(pending) >= EMBED_BATCH_SIZE:
+            self._dispatch(loop)
+        elif len(pending) == 1:
+            loop.call_later(EMBED_BATCH_WINDOW, self._dispatch, loop)
+            
+        return future
+        
+    def _dispatch(self, loop: asyncio.AbstractEventLoop):
+        """Send everything queued on a loop as one embeddings call."""
+        
+        batch = self._embed_pending.pop(loop, None)
+        if not batch:
+            return
+            
+        task = loop.create_task(self._embed_batch(batch))
+        # Keep a reference until it finishes
+        self._embed_tasks.add(task)
+        task.add_done_callback(self._embed_tasks.discard)
+        
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Embed a batch of queued texts and resolve their futures."""
+        
+        error = None
+        try:
+            response = await self.llm_client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=[text for text, _ in batch]
+            )
+            # Items carry the position of their input; ignore any out of range
+            for item in response.data:
+                if 0 <= item.index < len(batch):
+                    future = batch[item.index][1]
+                    if not future.done():
+                        future.set_result(np.asarray(item.embedding, dtype=np.float32))
+        except Exception as e:
+            error = e
+        finally:
+            # Short responses, errors and cancellation leave no caller awaiting forever
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(
+                        error or RuntimeError("Embedding batch returned no result for this input")
+                    )
+                    
     def save(self):
         """Save vector store."""
         self.store.save()
@@ -1,9 +1,10 @@
 """Models package."""
 
-from models.router import ModelRouter, ModelProvider, ModelConfig
+from models.router import ModelRouter, ModelProvider, ModelConfig, ModelSpec
 
 __all__ = [
     "ModelRouter",
     "ModelProvider",
     "ModelConfig",
+    "ModelSpec",
 ]
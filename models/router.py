@@ -1,7 +1,10 @@
 """Model router for selecting appropriate LLM based on subscription tier."""
 
+import os
+import threading
+from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, Any
+from typing import Optional, Any, Callable, Dict, Tuple
 from subscription.manager import SubscriptionTier
 import config
 
@@ -16,79 +19,155 @@ class ModelProvider(str, Enum):
     OLLAMA = "ollama"
 
 
+@dataclass(frozen=True, slots=True)
+class ModelSpec:
+    """Immutable description of one LLM model."""
+    
+    provider: ModelProvider
+    model: str
+    api_key_env: Optional[str]
+    temperature: float
+    max_tokens: int
+
+
 class ModelConfig:
     """Configuration for LLM models."""
     
     # Free Tier Models
     FREE_MODELS = {
-        "groq": {
-            "provider": ModelProvider.GROQ,
-            "model": "llama-3.3-70b-versatile",
-            "api_key_env": "GROQ_API_KEY",
-            "temperature": 0.7,
-            "max_tokens": 2048
-        },
-        "gemini_flash": {
-            "provider": ModelProvider.GOOGLE,
-            "model": "gemini-1.5-flash",
-            "api_key_env": "GEMINI_API_KEY",
-            "temperature": 0.7,
-            "max_tokens": 2048
-        },
-        "deepseek": {
-            "provider": ModelProvider.DEEPSEEK,
-            "model": "deepseek-chat",
-            "api_key_env": "DEEPSEEK_API_KEY",
-            "temperature": 0.7,
-            "max_tokens": 2048
-        },
-        "ollama": {
-            "provider": ModelProvider.OLLAMA,
-            "model": "llama3:70b",
-            "api_key_env": None,
-            "temperature": 0.7,
-            "max_tokens": 2048
-        }
+        "groq": ModelSpec(
+            provider=ModelProvider.GROQ,
+            model="llama-3.3-70b-versatile",
+            api_key_env="GROQ_API_KEY",
+            temperature=0.7,
+            max_tokens=2048
+        ),
+        "gemini_flash": ModelSpec(
+            provider=ModelProvider.GOOGLE,
+            model="gemini-1.5-flash",
+            api_key_env="GEMINI_API_KEY",
+            temperature=0.7,
+            max_tokens=2048
+        ),
+        "deepseek": ModelSpec(
+            provider=ModelProvider.DEEPSEEK,
+            model="deepseek-chat",
+            api_key_env="DEEPSEEK_API_KEY",
+            temperature=0.7,
+            max_tokens=2048
+        ),
+        "ollama": ModelSpec(
+            provider=ModelProvider.OLLAMA,
+            model="llama3:70b",
+            api_key_env=None,
+            temperature=0.7,
+            max_tokens=2048
+        )
     }
     
     # Premium Tier Models
     PREMIUM_MODELS = {
-        "gpt4": {
-            "provider": ModelProvider.OPENAI,
-            "model": "gpt-4-turbo-preview",
-            "api_key_env": "OPENAI_API_KEY",
-            "temperature": 0.7,
-            "max_tokens": 4096
-        },
-        "claude": {
-            "provider": ModelProvider.ANTHROPIC,
-            "model": "claude-3-5-sonnet-20241022",
-            "api_key_env": "ANTHROPIC_API_KEY",
-            "temperature": 0.7,
-            "max_tokens": 4096
-        },
-        "gemini_pro": {
-            "provider": ModelProvider.GOOGLE,
-            "model": "gemini-1.5-pro",
-            "api_key_env": "GEMINI_API_KEY",
-            "temperature": 0.7,
-            "max_tokens": 4096
-        }
+        "gpt4": ModelSpec(
+            provider=ModelProvider.OPENAI,
+            model="gpt-4-turbo-preview",
+            api_key_env="OPENAI_API_KEY",
+            temperature=0.7,
+            max_tokens=4096
+        ),
+        "claude": ModelSpec(
+            provider=ModelProvider.ANTHROPIC,
+            model="claude-3-5-sonnet-20241022",
+            api_key_env="ANTHROPIC_API_KEY",
+            temperature=0.7,
+            max_tokens=4096
+        ),
+        "gemini_pro": ModelSpec(
+            provider=ModelProvider.GOOGLE,
+            model="gemini-1.5-pro",
+            api_key_env="GEMINI_API_KEY",
+            temperature=0.7,
+            max_tokens=4096
+        )
     }
 
 
+# Client constructors, one per provider. SDKs are imported on first use so
+# providers that are never selected are never imported.
+
+def _make_openai_client(model_config: ModelSpec) -> Any:
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=os.getenv(model_config.api_key_env))
+
+
+def _make_anthropic_client(model_config: ModelSpec) -> Any:
+    from anthropic import AsyncAnthropic
+    return AsyncAnthropic(api_key=os.getenv(model_config.api_key_env))
+
+
+def _make_google_client(model_config: ModelSpec) -> Any:
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv(model_config.api_key_env))
+    return genai.GenerativeModel(model_config.model)
+
+
+def _make_groq_client(model_config: ModelSpec) -> Any:
+    from groq import AsyncGroq
+    return AsyncGroq(api_key=os.getenv(model_config.api_key_env))
+
+
+def _make_deepseek_client(model_config: ModelSpec) -> Any:
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key=os.getenv(model_config.api_key_env),
+        base_url="https://api.deepseek.com"
+    )
+
+
+def _make_ollama_client(model_config: ModelSpec) -> Any:
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key="ollama",
+        base_url="http://localhost:11434/v1"
+    )
+
+
+_PROVIDER_FACTORIES: Dict[ModelProvider, Callable[[ModelSpec], Any]] = {
+    ModelProvider.OPENAI: _make_openai_client,
+    ModelProvider.ANTHROPIC: _make_anthropic_client,
+    ModelProvider.GOOGLE: _make_google_client,
+    ModelProvider.GROQ: _make_groq_client,
+    ModelProvider.DEEPSEEK: _make_deepseek_client,
+    ModelProvider.OLLAMA: _make_ollama_client,
+}
+
+# One client per (provider, model) for the whole process, shared by every
+# router: clients own HTTP connection pools, which are only reused if the
+# client is. Routers are built from worker threads, hence the lock
+_client_cache: Dict[Tuple[ModelProvider, str], Any] = {}
+_client_cache_lock = threading.Lock()
+
+
 class ModelRouter:
     """Routes requests to appropriate LLM based on subscription tier."""
     
     def __init__(self):
         self.free_model_priority = ["groq", "gemini_flash", "deepseek", "ollama"]
         self.premium_model_priority = ["gpt4", "claude"]  # Removed gemini_pro - not configured
+        
+        # Names of models whose API key is configured, resolved once
+        self._available = {
+            name
+            for models in (ModelConfig.FREE_MODELS, ModelConfig.PREMIUM_MODELS)
+            for name, model_config in models.items()
+            # Ollama doesn't need API key
+            if model_config.api_key_env is None or os.getenv(model_config.api_key_env)
+        }
     
     def select_model(
         self,
         tier: SubscriptionTier,
         preferred_provider: Optional[str] = None
-    ) -> dict:
+    ) -> ModelSpec:
         """
         Select appropriate model based on subscription tier.
         
@@ -97,7 +176,7 @@ class ModelRouter:
             preferred_provider: Optional preferred provider
             
         Returns:
-            Model configuration dictionary
+            Model specification
         """
         
         if tier == SubscriptionTier.FREE:
@@ -105,106 +184,64 @@ class ModelRouter:
         else:
             return self._select_premium_model(preferred_provider)
     
-    def _select_free_model(self, preferred: Optional[str] = None) -> dict:
+    def _select_free_model(self, preferred: Optional[str] = None) -> ModelSpec:
         """Select a free tier model."""
         
         # Try preferred model first
         if preferred and preferred in ModelConfig.FREE_MODELS:
-            model_config = ModelConfig.FREE_MODELS[preferred]
-            if self._is_model_available(model_config):
-                return model_config
+            if self._is_model_available(preferred):
+                return ModelConfig.FREE_MODELS[preferred]
         
         # Try models in priority order
         for model_name in self.free_model_priority:
-            model_config = ModelConfig.FREE_MODELS[model_name]
-            if self._is_model_available(model_config):
-                return model_config
+            if self._is_model_available(model_name):
+                return ModelConfig.FREE_MODELS[model_name]
         
         # Fallback to first available
         return ModelConfig.FREE_MODELS["groq"]
     
-    def _select_premium_model(self, preferred: Optional[str] = None) -> dict:
+    def _select_premium_model(self, preferred: Optional[str] = None) -> ModelSpec:
         """Select a premium tier model."""
         
         # Try preferred model first
         if preferred and preferred in ModelConfig.PREMIUM_MODELS:
-            model_config = ModelConfig.PREMIUM_MODELS[preferred]
-            if self._is_model_available(model_config):
-                return model_config
+            if self._is_model_available(preferred):
+                return ModelConfig.PREMIUM_MODELS[preferred]
         
         # Try models in priority order
         for model_name in self.premium_model_priority:
-            model_config = ModelConfig.PREMIUM_MODELS[model_name]
-            if self._is_model_available(model_config):
-                return model_config
+            if self._is_model_available(model_name):
+                return ModelConfig.PREMIUM_MODELS[model_name]
         
         # Fallback to GPT-4
         return ModelConfig.PREMIUM_MODELS["gpt4"]
     
-    def _is_model_available(self, model_config: dict) -> bool:
+    def _is_model_available(self, model_name: str) -> bool:
         """Check if model is available (has API key configured)."""
         
-        api_key_env = model_config.get("api_key_env")
-        
-        # Ollama doesn't need API key
-        if api_key_env is None:
-            return True
-        
-        # Check if API key is configured
-        import os
-        return bool(os.getenv(api_key_env))
+        return model_name in self._available
     
-    def get_client(self, model_config: dict) -> Any:
+    def get_client(self, model_config: ModelSpec) -> Any:
         """
         Get LLM client for the selected model.
         
         Args:
-            model_config: Model configuration dictionary
+            model_config: Model specification
             
         Returns:
-            Configured LLM client
+            Configured LLM client (shared by calls for the same model)
         """
         
-        provider = model_config["provider"]
-        
-        if provider == ModelProvider.OPENAI:
-            from openai import AsyncOpenAI
-            import os
-            return AsyncOpenAI(api_key=os.getenv(model_config["api_key_env"]))
-        
-        elif provider == ModelProvider.ANTHROPIC:
-            from anthropic import AsyncAnthropic
-            import os
-            return AsyncAnthropic(api_key=os.getenv(model_config["api_key_env"]))
-        
-        elif provider == ModelProvider.GOOGLE:
-            import google.generativeai as genai
-            import os
-            genai.configure(api_key=os.getenv(model_config["api_key_env"]))
-            return genai.GenerativeModel(model_config["model"])
-        
-        elif provider == ModelProvider.GROQ:
-            from groq import AsyncGroq
-            import os
-            return AsyncGroq(api_key=os.getenv(model_config["api_key_env"]))
-        
-        elif provider == ModelProvider.DEEPSEEK:
-            from openai import AsyncOpenAI
-            import os
-            return AsyncOpenAI(
-                api_key=os.getenv(model_config["api_key_env"]),
-                base_url="https://api.deepseek.com"
-            )
-        
-        elif provider == ModelProvider.OLLAMA:
-            from openai import AsyncOpenAI
-            return AsyncOpenAI(
-                api_key="ollama",
-                base_url="http://localhost:11434/v1"
-            )
-        
-        else:
-            raise ValueError(f"Unsupported provider: {provider}")
+        provider = model_config.provider
+        key = (provider, model_config.model)
+        with _client_cache_lock:
+            client = _client_cache.get(key)
+            if client is None:
+                factory = _PROVIDER_FACTORIES.get(provider)
+                if factory is None:
+                    raise ValueError(f"Unsupported provider: {provider}")
+                client = _client_cache[key] = factory(model_config)
+        return client
     
     def get_model_info(self, tier: SubscriptionTier) -> dict:
         """Get information about available models for a tier."""
@@ -219,9 +256,9 @@ class ModelRouter:
             "available_models": list(models.keys()),
             "model_details": {
                 name: {
-                    "provider": config["provider"],
-                    "model": config["model"]
+                    "provider": spec.provider,
+                    "model": spec.model
                 }
-                for name, config in models.items()
+                for name, spec in models.items()
             }
         }
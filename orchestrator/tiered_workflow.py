@@ -25,13 +25,19 @@ class TieredResearchOrchestrator:
     Coordinates all agents with subscription tier awareness.
     """
     
-    def __init__(self, user_id: str = "default_user", tier: SubscriptionTier = SubscriptionTier.FREE):
+    def __init__(
+        self,
+        user_id: str = "default_user",
+        tier: SubscriptionTier = SubscriptionTier.FREE,
+        model_router: Optional[ModelRouter] = None
+    ):
         """
         Initialize orchestrator with subscription tier.
         
         Args:
             user_id: User identifier
             tier: Subscription tier (free or premium)
+            model_router: Shared router (a new one is created if omitted)
         """
         self.user_id = user_id
         self.tier = tier
@@ -43,17 +49,17 @@ class TieredResearchOrchestrator:
         subscription.tier = tier
         
         # Initialize model router
-        self.model_router = ModelRouter()
+        self.model_router = model_router or ModelRouter()
         
         # Select appropriate model based on tier
         self.model_config = self.model_router.select_model(tier)
         self.llm_client = self.model_router.get_client(self.model_config)
         
         self.logger.info(f"Initialized with {tier.value} tier")
-        self.logger.info(f"Using model: {self.model_config['model']}")
+        self.logger.info(f"Using model: {self.model_config.model}")
         
         # Get model name to pass to agents
-        model_name = self.model_config['model']
+        model_name = self.model_config.model
         
         # Initialize agents with model name
         self.agents = {
@@ -120,13 +126,27 @@ class TieredResearchOrchestrator:
             self.logger.info("STAGE 1: Query Expansion")
             self.logger.info("=" * 60)
             
-            expansion_result = await self.agents["query_expansion"].run({
-                "query": query
-            })
+            # Speculatively search the raw query while expansion waits on the LLM;
+            # its results seed the first search round
+            max_results_per_query = 10 if self.tier == SubscriptionTier.PREMIUM else 5
+            
+            expansion_result, prefetch_result = await asyncio.gather(
+                self.agents["query_expansion"].run({
+                    "query": query
+                }),
+                self.agents["search"].run({
+                    "queries": [query],
+                    "max_results_per_query": max_results_per_query
+                })
+            )
+            
+            prefetched_results = prefetch_result.output_data.get("search_results", [])
+            self.agents["search"].release_state(prefetch_result)
             
             # Update context with expansion results, with fallback
             if expansion_result.output_data:
                 context.update(expansion_result.output_data)
+            self.agents["query_expansion"].release_state(expansion_result)
             
             # Ensure required keys exist
             if "research_outline" not in context:
@@ -154,12 +174,19 @@ class TieredResearchOrchestrator:
                 self.logger.info("\nSTAGE 2: Web Search")
                 search_queries = self._generate_search_queries(context)
                 
-                search_result = await self.agents["search"].run({
+                search_input = {
                     "queries": search_queries,
-                    "max_results_per_query": 10 if self.tier == SubscriptionTier.PREMIUM else 5
-                })
+                    "max_results_per_query": max_results_per_query
+                }
+                if iteration == 0 and prefetched_results:
+                    search_input["seed_results"] = prefetched_results
+                    if search_queries == [query]:
+                        search_input["queries"] = []  # Already searched by the prefetch
+                        
+                search_result = await self.agents["search"].run(search_input)
                 
                 context["search_results"] = search_result.output_data["search_results"]
+                self.agents["search"].release_state(search_result)
                 
                 # Summarize
                 self.logger.info("\nSTAGE 3: Content Summarization")
@@ -173,6 +200,7 @@ class TieredResearchOrchestrator:
                 if "summaries" not in context:
                     context["summaries"] = []
                 context["summaries"].extend(summarizer_result.output_data["summaries"])
+                self.agents["summarizer"].release_state(summarizer_result)
                 
                 # Fact Check (tier-dependent)
                 if limits.advanced_fact_checking:
@@ -182,6 +210,7 @@ class TieredResearchOrchestrator:
                     })
                     context["verified_facts"] = fact_check_result.output_data["verified_facts"]
                     context["consensus_facts"] = fact_check_result.output_data["consensus_facts"]
+                    self.agents["fact_checker"].release_state(fact_check_result)
                 else:
                     self.logger.info("\nSTAGE 4: Basic Fact Extraction")
                     context["verified_facts"] = self._extract_basic_facts(context["summaries"])
@@ -198,6 +227,8 @@ class TieredResearchOrchestrator:
                     
                     context["gaps"] = gap_result.output_data["gaps_found"]
                     context["coverage_score"] = gap_result.output_data["coverage_score"]
+                    needs_more_research = gap_result.output_data["needs_more_research"]
+                    self.agents["gap_finder"].release_state(gap_result)
                     
                     display_research_summary({
                         "Iteration": f"{iteration + 1}/{max_iterations}",
@@ -207,7 +238,7 @@ class TieredResearchOrchestrator:
                         "Coverage": f"{context['coverage_score']:.1f}%"
                     })
                     
-                    if not gap_result.output_data["needs_more_research"]:
+                    if not needs_more_research:
                         self.logger.info("\n✅ Research coverage sufficient!")
                         break
                 else:
@@ -227,6 +258,7 @@ class TieredResearchOrchestrator:
             
             context["report"] = writer_result.output_data["report"]
             context["metadata"] = writer_result.output_data["metadata"]
+            self.agents["writer"].release_state(writer_result)
             
             # Apply word limit
             context["report"] = self._apply_word_limit(context["report"], limits.word_limit)
@@ -238,6 +270,7 @@ class TieredResearchOrchestrator:
                     "report": context["report"]
                 })
                 context["edited_report"] = editor_result.output_data["edited_report"]
+                self.agents["editor"].release_state(editor_result)
             else:
                 context["edited_report"] = context["report"]
             
@@ -257,6 +290,7 @@ class TieredResearchOrchestrator:
             
             context["final_report"] = citation_result.output_data["report_with_citations"]
             context["references"] = citation_result.output_data["references"]
+            self.agents["citation"].release_state(citation_result)
             
             # Stage 9: Publishing
             self.logger.info("\nSTAGE 9: Publishing")
@@ -276,6 +310,7 @@ class TieredResearchOrchestrator:
             })
             
             context["output_files"] = publisher_result.output_data["output_files"]
+            self.agents["publisher"].release_state(publisher_result)
             
             # Record usage
             self.subscription_manager.record_usage(self.user_id)
@@ -3,16 +3,40 @@ Advanced Caching System with Embedding-Based Similarity
 Provides fast query caching with semantic matching for similar queries.
 """
 
+import asyncio
 import json
 import hashlib
 import pickle
+import re
+import shelve
+import functools
+import threading
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple, Callable
 from pathlib import Path
 import logging
 
+import numpy as np
+
+from utils.json_utils import parse_llm_json
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+_NUMBERED_LINE_RE = re.compile(r'^\s*\d+\.\s+(.+)$', re.MULTILINE)
+_TOKEN_RE = re.compile(r'\w+')
+
 
 class QueryCache:
     """Cache system for research queries with semantic similarity matching."""
@@ -30,6 +54,10 @@ class QueryCache:
         self.ttl = timedelta(hours=ttl_hours)
         self.metadata_file = self.cache_dir / "cache_metadata.json"
         self.metadata = self._load_metadata()
+        
+        # Running totals so get_stats() doesn't walk entries or stat files
+        self._total_hits = sum(meta["hits"] for meta in self.metadata.values())
+        self._total_bytes = sum(self._entry_size(key) for key in self.metadata)
     
     def _load_metadata(self) -> Dict[str, Any]:
         """Load cache metadata."""
@@ -55,6 +83,22 @@ class QueryCache:
         """Get file path for cache key."""
         return self.cache_dir / f"{cache_key}.pkl"
     
+    def _entry_size(self, cache_key: str) -> int:
+        """Size in bytes of a cached entry; recorded at write time when known."""
+        size = self.metadata[cache_key].get("size")
+        if size is None:
+            try:
+                size = self._get_cache_path(cache_key).stat().st_size
+            except OSError:
+                size = 0
+        return size
+    
+    def _record_hit(self, cache_key: str):
+        """Count a hit on an entry and persist it."""
+        self.metadata[cache_key]["hits"] += 1
+        self._total_hits += 1
+        self._save_metadata()
+    
     def get(self, query: str, tier: str, mode: str) -> Optional[Dict[str, Any]]:
         """
         Get cached result for query.
@@ -93,8 +137,7 @@ class QueryCache:
                 data = pickle.load(f)
             
             logger.info(f"Cache hit: {query}")
-            self.metadata[cache_key]["hits"] += 1
-            self._save_metadata()
+            self._record_hit(cache_key)
             
             return data
         except Exception as e:
@@ -125,6 +168,12 @@ class QueryCache:
             # Save data
             with open(cache_path, 'wb') as f:
                 pickle.dump(data, f)
+                size = f.tell()
+            
+            # Replacing an entry drops its previous totals
+            if cache_key in self.metadata:
+                self._total_hits -= self.metadata[cache_key]["hits"]
+                self._total_bytes -= self._entry_size(cache_key)
             
             # Update metadata
             self.metadata[cache_key] = {
@@ -132,8 +181,10 @@ class QueryCache:
                 "tier": tier,
                 "mode": mode,
                 "timestamp": datetime.now().isoformat(),
-                "hits": 0
+                "hits": 0,
+                "size": size
             }
+            self._total_bytes += size
             self._save_metadata()
             
             logger.info(f"Cached: {query}")
@@ -145,6 +196,10 @@ class QueryCache:
         """Delete cache entry."""
         cache_path = self._get_cache_path(cache_key)
         
+        if cache_key in self.metadata:
+            self._total_hits -= self.metadata[cache_key]["hits"]
+            self._total_bytes -= self._entry_size(cache_key)
+        
         if cache_path.exists():
             cache_path.unlink()
         
@@ -174,21 +229,14 @@ class QueryCache:
         logger.info("Cleared all cache entries")
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get cache statistics."""
+        """Get cache statistics (O(1), from running totals)."""
         total_entries = len(self.metadata)
-        total_hits = sum(meta["hits"] for meta in self.metadata.values())
-        
-        # Calculate cache size
-        total_size = sum(
-            self._get_cache_path(key).stat().st_size 
-            for key in self.metadata.keys()
-            if self._get_cache_path(key).exists()
-        )
+        total_hits = self._total_hits
         
         return {
             "total_entries": total_entries,
             "total_hits": total_hits,
-            "total_size_mb": total_size / (1024 * 1024),
+            "total_size_mb": self._total_bytes / (1024 * 1024),
             "avg_hits_per_entry": total_hits / total_entries if total_entries > 0 else 0
         }
 
@@ -255,8 +303,7 @@ class SimilarityCache:
                             data = pickle.load(f)
                         
                         # Update hit count
-                        meta["hits"] += 1
-                        self.base_cache._save_metadata()
+                        self.base_cache._record_hit(cache_key)
                         
                         return data
                     except:
@@ -277,8 +324,359 @@ class SimilarityCache:
         return self.base_cache.get_stats()
 
 
-# Singleton instance
+class SemanticResponseCache:
+    """
+    Cache of LLM responses keyed by prompt, with embedding-based matching.
+    
+    Exact prompt matches are served directly. Otherwise the prompt is embedded
+    and compared against earlier prompts that share the same model and system
+    prompt; a near-duplicate is only served if its numbered items (or words)
+    also overlap lexically, so prompts that differ in a single key term
+    (e.g. "CPC" vs "CPM") still go to the LLM.
+    
+    get() and set() are blocking (model load, encode, shelve I/O) and are
+    serialized by an internal lock, so they can be called from worker threads.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: str = "cache",
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        lexical_threshold: float = 0.8,
+        ttl_hours: int = 24
+    ):
+        """
+        Initialize response cache.
+        
+        Args:
+            cache_dir: Directory for cache storage
+            model_name: Sentence-transformers model used for prompt embeddings
+            lexical_threshold: Minimum token Jaccard similarity for a semantic hit
+            ttl_hours: Time-to-live for cached responses in hours
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True)
+        self.model_name = model_name
+        self.lexical_threshold = lexical_threshold
+        self.ttl = timedelta(hours=ttl_hours)
+        self._lock = threading.Lock()
+        self._store = shelve.open(str(self.cache_dir / "llm_responses"))
+        self._encoder = None
+        self._last_embedding: Optional[Tuple[str, np.ndarray]] = None
+        self._buckets: Optional[Dict[str, Tuple[Any, List[str]]]] = None
+    
+    def _get_encoder(self):
+        """Load the embedding model on first use."""
+        if self._encoder is None and SENTENCE_TRANSFORMERS_AVAILABLE:
+            self._encoder = SentenceTransformer(self.model_name)
+        return self._encoder
+    
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text as a unit-norm float32 vector."""
+        # A miss in get() is followed by set() for the same prompt
+        if self._last_embedding and self._last_embedding[0] == text:
+            return self._last_embedding[1]
+        
+        encoder = self._get_encoder()
+        if encoder is None:
+            return None
+        embedding = encoder.encode([text], normalize_embeddings=True).astype(np.float32)
+        self._last_embedding = (text, embedding)
+        return embedding
+    
+    @staticmethod
+    def _make_keys(model: str, system_prompt: str, user_prompt: str) -> Tuple[str, str]:
+        """Build the (entry key, bucket key) pair for a prompt."""
+        key = hashlib.sha256(f"{model}\0{system_prompt}\0{user_prompt}".encode()).hexdigest()
+        bucket = hashlib.md5(f"{model}\0{system_prompt}".encode()).hexdigest()
+        return key, bucket
+    
+    @staticmethod
+    def _lexical_tokens(user_prompt: str) -> Set[str]:
+        """Tokenize the numbered items of a prompt (or the whole prompt)."""
+        items = _NUMBERED_LINE_RE.findall(user_prompt)
+        text = "\n".join(items) if items else user_prompt
+        return set(_TOKEN_RE.findall(text.lower()))
+    
+    @staticmethod
+    def _jaccard(tokens1: Set[str], tokens2: Set[str]) -> float:
+        """Jaccard similarity of two token sets."""
+        union = tokens1 | tokens2
+        if not union:
+            return 0.0
+        return len(tokens1 & tokens2) / len(union)
+    
+    def _live_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a stored entry, dropping it if expired (or stored without a timestamp)."""
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        timestamp = entry.get("timestamp")
+        if timestamp is None or datetime.now() - timestamp > self.ttl:
+            del self._store[key]
+            return None
+        return entry
+    
+    def _new_index(self, dimension: int):
+        """Create an inner-product index (FAISS if available)."""
+        if FAISS_AVAILABLE:
+            return faiss.IndexFlatIP(dimension)
+        return np.empty((0, dimension), dtype=np.float32)
+    
+    def _index_add(self, bucket: str, key: str, embedding: np.ndarray):
+        """Add an embedding to a bucket's index."""
+        if bucket not in self._buckets:
+            self._buckets[bucket] = (self._new_index(embedding.shape[1]), [])
+        index, keys = self._buckets[bucket]
+        if FAISS_AVAILABLE:
+            index.add(embedding)
+        else:
+            self._buckets[bucket] = (np.vstack([index, embedding]), keys)
+        keys.append(key)
+    
+    def _load_buckets(self):
+        """Rebuild in-memory indexes from the persisted entries."""
+        if self._buckets is not None:
+            return
+        self._buckets = {}
+        for key in list(self._store.keys()):
+            entry = self._live_entry(key)
+            if entry is not None and entry.get("embedding") is not None:
+                self._index_add(entry["bucket"], key, entry["embedding"])
+    
+    def get(
+        self,
+        model: str,
+        system_prompt: str,
+        user_prompt: str,
+        threshold: float = 0.92
+    ) -> Optional[str]:
+        """
+        Get a cached response for a prompt.
+        
+        Args:
+            model: Model name the response was generated with
+            system_prompt: System prompt
+            user_prompt: User prompt
+            threshold: Minimum cosine similarity for a semantic hit
+            
+        Returns:
+            Cached response or None
+        """
+        key, bucket = self._make_keys(model, system_prompt, user_prompt)
+        
+        with self._lock:
+            return self._get(key, bucket, system_prompt, user_prompt, threshold)
+    
+    def _get(
+        self,
+        key: str,
+        bucket: str,
+        system_prompt: str,
+        user_prompt: str,
+        threshold: float
+    ) -> Optional[str]:
+        """Lookup behind get(); the caller holds self._lock."""
+        try:
+            entry = self._live_entry(key)
+            if entry is not None:
+                logger.debug("LLM response cache hit (exact)")
+                return entry["response"]
+            
+            embedding = self._embed(f"{system_prompt}\n{user_prompt}")
+            if embedding is None:
+                return None
+            
+            self._load_buckets()
+            if bucket not in self._buckets:
+                return None
+            
+            index, keys = self._buckets[bucket]
+            if FAISS_AVAILABLE:
+                scores, indices = index.search(embedding, 1)
+                score, idx = float(scores[0][0]), int(indices[0][0])
+            else:
+                similarities = index @ embedding[0]
+                idx = int(np.argmax(similarities))
+                score = float(similarities[idx])
+            
+            if idx < 0 or score < threshold:
+                return None
+            
+            # Expired entries stay in the index until the next restart
+            entry = self._live_entry(keys[idx])
+            if entry is None:
+                return None
+            lexical = self._jaccard(self._lexical_tokens(user_prompt), entry["tokens"])
+            if lexical < self.lexical_threshold:
+                logger.debug(f"Semantic match rejected by lexical check ({lexical:.2f})")
+                return None
+            
+            logger.debug(f"LLM response cache hit (semantic {score:.3f})")
+            return entry["response"]
+            
+        except Exception as e:
+            logger.error(f"Response cache lookup failed: {e}")
+            return None
+    
+    def set(self, model: str, system_prompt: str, user_prompt: str, response: str):
+        """
+        Cache an LLM response.
+        
+        Args:
+            model: Model name the response was generated with
+            system_prompt: System prompt
+            user_prompt: User prompt
+            response: LLM response text
+        """
+        key, bucket = self._make_keys(model, system_prompt, user_prompt)
+        
+        try:
+            with self._lock:
+                embedding = self._embed(f"{system_prompt}\n{user_prompt}")
+                self._store[key] = {
+                    "bucket": bucket,
+                    "embedding": embedding,
+                    "tokens": self._lexical_tokens(user_prompt),
+                    "response": response,
+                    "timestamp": datetime.now()
+                }
+                self._store.sync()
+                
+                if embedding is not None and self._buckets is not None:
+                    self._index_add(bucket, key, embedding)
+                    
+        except Exception as e:
+            logger.error(f"Response cache save failed: {e}")
+
+
+class KeyedResultCache:
+    """
+    Persistent cache of agent results keyed by a SHA-256 of their input.
+    
+    Used for agent steps whose output is a pure function of one input string
+    (a query, a page's content) so retries and repeat runs skip the LLM.
+    get() and set() do blocking shelve I/O; coroutines use aget()/aset().
+    """
+    
+    def __init__(self, namespace: str, cache_dir: str = "cache", ttl_hours: int = 24):
+        """
+        Initialize keyed cache.
+        
+        Args:
+            namespace: Store name, one shelve file per namespace
+            cache_dir: Directory for cache storage
+            ttl_hours: Time-to-live for cached entries in hours
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True)
+        self.ttl = timedelta(hours=ttl_hours)
+        self._lock = threading.Lock()
+        self._store = shelve.open(str(self.cache_dir / namespace))
+    
+    @staticmethod
+    def make_key(text: str) -> str:
+        """Hash the input text into a cache key."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached result.
+        
+        Args:
+            key: Cache key from make_key()
+            
+        Returns:
+            Cached value or None if not found/expired
+        """
+        try:
+            with self._lock:
+                entry = self._store.get(key)
+                if entry is None:
+                    return None
+                
+                timestamp, value = entry
+                if datetime.now() - timestamp > self.ttl:
+                    del self._store[key]
+                    return None
+                
+                return value
+            
+        except Exception as e:
+            logger.error(f"Result cache lookup failed: {e}")
+            return None
+    
+    def set(self, key: str, value: Any):
+        """
+        Cache a result.
+        
+        Args:
+            key: Cache key from make_key()
+            value: Picklable result to cache
+        """
+        try:
+            with self._lock:
+                self._store[key] = (datetime.now(), value)
+                self._store.sync()
+        except Exception as e:
+            logger.error(f"Result cache save failed: {e}")
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """Async get() that doesn't block the event loop."""
+        return await asyncio.to_thread(self.get, key)
+    
+    async def aset(self, key: str, value: Any):
+        """Async set() that doesn't block the event loop."""
+        await asyncio.to_thread(self.set, key, value)
+
+
+def _is_json(response: str) -> bool:
+    """Whether an LLM response parses as JSON (fenced or not)."""
+    try:
+        parse_llm_json(response)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def semantic_cache(
+    threshold: float = 0.92,
+    validate: Callable[[str], bool] = _is_json
+):
+    """
+    Decorator caching an agent's `_call_llm(system_prompt, user_prompt)` results.
+    
+    Cache lookups and writes run in a worker thread so they don't block the
+    event loop.
+    
+    Args:
+        threshold: Minimum cosine similarity for serving a near-duplicate prompt
+        validate: Only responses it accepts are cached (default: valid JSON)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, system_prompt: str, user_prompt: str, *args, **kwargs):
+            cache = get_response_cache()
+            cached = await asyncio.to_thread(
+                cache.get, self.model_name, system_prompt, user_prompt, threshold
+            )
+            if cached is not None:
+                return cached
+            
+            response = await func(self, system_prompt, user_prompt, *args, **kwargs)
+            if validate(response):
+                await asyncio.to_thread(
+                    cache.set, self.model_name, system_prompt, user_prompt, response
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+# Singleton instances
 _cache = None
+_response_cache = None
+_result_caches: Dict[str, KeyedResultCache] = {}
 
 
 def get_cache(similarity_enabled: bool = True) -> QueryCache:
@@ -290,3 +688,19 @@ def get_cache(similarity_enabled: bool = True) -> QueryCache:
         else:
             _cache = QueryCache()
     return _cache
+
+
+def get_response_cache() -> SemanticResponseCache:
+    """Get singleton LLM response cache instance."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = SemanticResponseCache()
+    return _response_cache
+
+
+def get_result_cache(namespace: str) -> KeyedResultCache:
+    """Get singleton keyed result cache for a namespace."""
+    cache = _result_caches.get(namespace)
+    if cache is None:
+        cache = _result_caches[namespace] = KeyedResultCache(namespace)
+    return cache
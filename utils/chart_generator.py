@@ -9,9 +9,14 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, List
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# pyplot's current-figure state is process-global; charts are rendered from
+# worker threads, so one report's charts are drawn at a time
+_render_lock = threading.Lock()
+
 
 class ChartGenerator:
     """Generate charts and visualizations for research reports."""
@@ -343,6 +348,15 @@ class ChartGenerator:
         Returns:
             Dictionary of chart_type -> filepath
         """
+        with _render_lock:
+            return self._generate_all_charts(report, base_filename)
+    
+    def _generate_all_charts(
+        self,
+        report: Dict[str, Any],
+        base_filename: str = None
+    ) -> Dict[str, str]:
+        """Body of generate_all_charts(); the caller holds _render_lock."""
         if not base_filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             base_filename = f"charts_{timestamp}"
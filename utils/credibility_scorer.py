@@ -4,12 +4,17 @@ Evaluates source reliability based on domain authority, content quality, and bia
 """
 
 from typing import Dict, Any, List
+from functools import lru_cache
 import re
 from urllib.parse import urlparse
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Distinct (url, title, snippet) scores kept per scorer; the same URL tends to
+# come back from several queries and research runs
+SCORE_CACHE_SIZE = 4096
+
 
 class CredibilityScorer:
     """Score source credibility and reliability."""
@@ -67,7 +72,7 @@ class CredibilityScorer:
     
     def __init__(self):
         """Initialize credibility scorer."""
-        pass
+        self._score_fields = lru_cache(maxsize=SCORE_CACHE_SIZE)(self._compute_score)
     
     def score_source(self, source: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -79,10 +84,16 @@ class CredibilityScorer:
         Returns:
             Dictionary with score and breakdown
         """
-        url = source.get("url", "")
-        title = source.get("title", "")
-        snippet = source.get("snippet", "")
-        
+        score = self._score_fields(
+            source.get("url", ""),
+            source.get("title", ""),
+            source.get("snippet", "")
+        )
+        # Callers own the returned dict; keep the cached one pristine
+        return dict(score, breakdown=dict(score["breakdown"]))
+    
+    def _compute_score(self, url: str, title: str, snippet: str) -> Dict[str, Any]:
+        """Score a source from its url, title and snippet (memoized per scorer)."""
         # Initialize scores
         scores = {
             "domain_authority": self._score_domain_authority(url),
@@ -0,0 +1,30 @@
+"""
+JSON helpers shared by the agents and stores.
+Serialization goes through orjson; LLM replies may arrive wrapped in a code fence.
+"""
+
+import re
+from typing import Any
+
+import orjson
+
+# orjson.loads accepts str or bytes; its errors subclass json.JSONDecodeError
+json_loads = orjson.loads
+# Returns UTF-8 bytes
+json_dumps = orjson.dumps
+
+# LLMs often wrap their JSON in a ```json fence
+_JSON_FENCE = re.compile(r'```(?:json)?\s*(\{.*\})\s*```', re.S)
+
+
+def parse_llm_json(response: str) -> Any:
+    """
+    Parse LLM JSON output, unwrapping a markdown code fence if present.
+    
+    Raises:
+        json.JSONDecodeError: If the reply isn't valid JSON
+    """
+    match = _JSON_FENCE.search(response)
+    if match:
+        response = match.group(1)
+    return json_loads(response)
@@ -51,6 +51,7 @@ def setup_logger(
     
     # File handler
     if log_file is None:
+        config.ensure_dirs()
         log_file = config.LOG_FILE
     
     file_handler = logging.FileHandler(log_file, encoding='utf-8')
@@ -0,0 +1,65 @@
+"""
+Line-level Markdown tokenizer for the publisher's exporters.
+Turns a report into (kind, text) tokens that exporters dispatch on directly.
+"""
+
+import re
+from typing import List, Tuple
+
+# (kind, text); kinds: "h1"-"h3", "p", "hr", "blank"
+Token = Tuple[str, str]
+
+# Heading depths the exporters render as headings; deeper ones stay body text
+HEADING_KINDS = {1: "h1", 2: "h2", 3: "h3"}
+
+# One match per line: a markdown heading (level, text) or a horizontal rule
+_LINE_RE = re.compile(r'(#{1,6}) \s*(.+)|---')
+
+
+def parse_line(line: str) -> Tuple[int, str]:
+    """
+    Classify a stripped, non-empty report line.
+    
+    Returns:
+        (level, text) where level is the heading depth, 0 for body text
+        and -1 for a horizontal rule
+    """
+    # Body text is the hot path; only heading/rule candidates hit the regex
+    if line[0] not in '#-':
+        return 0, line
+    m = _LINE_RE.match(line)
+    if m is None:
+        return 0, line
+    if m.group(1) is None:
+        return -1, line
+    return len(m.group(1)), m.group(2)
+
+
+def tokenize_markdown(text: str) -> List[Token]:
+    """
+    Tokenize Markdown text line by line.
+    
+    Args:
+        text: Markdown report or section content
+    
+    Returns:
+        List of (kind, text) tokens, one per line
+    """
+    tokens = []
+    append = tokens.append
+    
+    for line in map(str.strip, text.splitlines()):
+        if not line:
+            append(("blank", ""))
+            continue
+        
+        level, body = parse_line(line)
+        
+        if level < 0:
+            append(("hr", ""))
+        elif level in HEADING_KINDS:
+            append((HEADING_KINDS[level], body))
+        else:
+            append(("p", line))
+    
+    return tokens
@@ -7,7 +7,8 @@ with intelligent fallback and retry mechanisms.
 import asyncio
 import aiohttp
 import os
-from typing import List, Dict, Optional, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Optional, Any
 from datetime import datetime
 import logging
 from duckduckgo_search import DDGS
@@ -17,6 +18,16 @@ import wikipediaapi
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def _client_session(shared: Optional[aiohttp.ClientSession]) -> AsyncIterator[aiohttp.ClientSession]:
+    """Yield the injected shared session, or a short-lived one when none is set."""
+    if shared is not None and not shared.closed:
+        yield shared
+    else:
+        async with aiohttp.ClientSession() as session:
+            yield session
+
+
 class SearchResult:
     """Unified search result format."""
     
@@ -53,8 +64,9 @@ class SearchResult:
 class BraveSearchEngine:
     """Brave Search API - 2,000 free requests/month."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, session: Optional[aiohttp.ClientSession] = None):
         self.api_key = api_key or os.getenv("BRAVE_API_KEY")
+        self.session = session
         self.base_url = "https://api.search.brave.com/res/v1/web/search"
         
     async def search(self, query: str, max_results: int = 10) -> List[SearchResult]:
@@ -74,7 +86,7 @@ class BraveSearchEngine:
                 "count": max_results
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with _client_session(self.session) as session:
                 async with session.get(
                     self.base_url,
                     headers=headers,
@@ -108,8 +120,9 @@ class BraveSearchEngine:
 class ExaSearchEngine:
     """Exa Search API - 1,000 free requests/month."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, session: Optional[aiohttp.ClientSession] = None):
         self.api_key = api_key or os.getenv("EXA_API_KEY")
+        self.session = session
         self.base_url = "https://api.exa.ai/search"
         
     async def search(self, query: str, max_results: int = 10) -> List[SearchResult]:
@@ -133,7 +146,7 @@ class ExaSearchEngine:
                 }
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with _client_session(self.session) as session:
                 async with session.post(
                     self.base_url,
                     headers=headers,
@@ -236,8 +249,9 @@ class WikipediaSearchEngine:
 class SerpAPISearchEngine:
     """SerpAPI - Google Search (Premium)."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, session: Optional[aiohttp.ClientSession] = None):
         self.api_key = api_key or os.getenv("SERPAPI_KEY")
+        self.session = session
         self.base_url = "https://serpapi.com/search"
         
     async def search(self, query: str, max_results: int = 10) -> List[SearchResult]:
@@ -254,7 +268,7 @@ class SerpAPISearchEngine:
                 "engine": "google"
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with _client_session(self.session) as session:
                 async with session.get(
                     self.base_url,
                     params=params,
@@ -287,8 +301,14 @@ class SerpAPISearchEngine:
 class GoogleCSESearchEngine:
     """Google Custom Search Engine (Premium)."""
     
-    def __init__(self, api_key: Optional[str] = None, cx: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cx: Optional[str] = None,
+        session: Optional[aiohttp.ClientSession] = None
+    ):
         self.api_key = api_key or os.getenv("GOOGLE_CSE_API_KEY")
+        self.session = session
         self.cx = cx or os.getenv("GOOGLE_CSE_CX")
         self.base_url = "https://www.googleapis.com/customsearch/v1"
         
@@ -306,7 +326,7 @@ class GoogleCSESearchEngine:
                 "cx": self.cx
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with _client_session(self.session) as session:
                 async with session.get(
                     self.base_url,
                     params=params,
@@ -351,18 +371,21 @@ class MultiSourceSearchEngine:
     2. Google CSE
     3. Brave Search (paid)
     4. Exa Search (paid)
+    
+    An injected aiohttp session is shared by all HTTP engines so connections
+    are kept alive across searches; it must belong to the loop that runs them.
     """
     
-    def __init__(self, tier: str = "free"):
+    def __init__(self, tier: str = "free", session: Optional[aiohttp.ClientSession] = None):
         self.tier = tier
         
         # Initialize all engines
-        self.brave = BraveSearchEngine()
-        self.exa = ExaSearchEngine()
+        self.brave = BraveSearchEngine(session=session)
+        self.exa = ExaSearchEngine(session=session)
         self.duckduckgo = DuckDuckGoSearchEngine()
         self.wikipedia = WikipediaSearchEngine()
-        self.serpapi = SerpAPISearchEngine()
-        self.google_cse = GoogleCSESearchEngine()
+        self.serpapi = SerpAPISearchEngine(session=session)
+        self.google_cse = GoogleCSESearchEngine(session=session)
         
     async def search(
         self,